@@ -1,31 +1,69 @@
 import streamlit as st
+import pandas as pd
+import copy
+import hashlib
 import json
 import io
 import os
+import re
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Any
-
-# OpenAI client
-from openai import OpenAI
-
-# File processing
-import PyPDF2
-import docx
-from docx_generator import generate_docx_report as generate_docx_from_module
-
-# PDF generation
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-
-# Arabic text processing
-import arabic_reshaper
-from bidi.algorithm import get_display
+from types import ModuleType
+from typing import Dict, List, Any, Optional
+
+# Fast JSON encoding and decoding, with the standard library as a fallback
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# OpenAI, PyPDF2, python-docx and the ReportLab PDF stack are imported where
+# they are used, so a session that only fills in the form never loads them
+from form_rows import has_communication, has_job_level, has_competency, has_kpi
+
+# Form data keys grouped by section
+REF_KEYS = ('main_group', 'main_group_code', 'sub_group', 'sub_group_code', 'secondary_group', 'secondary_group_code',
+            'unit_group', 'unit_group_code', 'job', 'job_code', 'work_location', 'grade')
+COMPETENCY_KEYS = ('behavioral_competencies', 'core_competencies', 'leadership_competencies', 'technical_competencies')
+TASK_KEYS = ('leadership_tasks', 'specialized_tasks', 'other_tasks')
+
+# Blank form used for new sessions and by the reset button; always deep-copied before use
+EMPTY_FORM = {
+    'ref_data': {
+        'main_group': '', 'main_group_code': '', 'sub_group': '', 'sub_group_code': '',
+        'secondary_group': '', 'secondary_group_code': '', 'unit_group': '', 'unit_group_code': '',
+        'job': '', 'job_code': '', 'work_location': '', 'grade': ''
+    },
+    'summary': '',
+    'internal_communications': [{'entity': '', 'purpose': ''}],
+    'external_communications': [{'entity': '', 'purpose': ''}],
+    'job_levels': [{'level': '', 'code': '', 'role': '', 'progression': ''}],
+    'behavioral_competencies': [{'name': '', 'level': ''}],
+    'core_competencies': [{'name': '', 'level': ''}],
+    'leadership_competencies': [{'name': '', 'level': ''}],
+    'technical_competencies': [{'name': '', 'level': ''}],
+    'leadership_tasks': [''],
+    'specialized_tasks': [''],
+    'other_tasks': [''],
+    'behavioral_table': [{'name': '', 'level': ''}],
+    'technical_table': [{'name': '', 'level': ''}],
+    'kpis': [{'metric': '', 'measure': ''}]
+}
+
+# Form fields an AI analysis replaces outright; ref_data is merged instead
+AI_FILL_KEYS = tuple(key for key in EMPTY_FORM if key != 'ref_data')
+
+# Timestamp formats for report file names and the PDF creation date
+TIMESTAMP_FMT = "%Y%m%d_%H%M%S"
+REPORT_TIME_FMT = "%Y-%m-%d %H:%M:%S"
 
 # Font configuration
 AR_FONT_REGULAR = "NotoNaskhArabic-Regular"
@@ -33,9 +71,23 @@ AR_FONT_BOLD = "NotoNaskhArabic-Bold"
 AR_FONT_REGULAR_PATH = "fonts/NotoNaskhArabic-Regular.ttf"
 AR_FONT_BOLD_PATH = "fonts/NotoNaskhArabic-Bold.ttf"
 
-# OpenAI API configuration
+# OpenAI API configuration; a key once found is kept for the process, while
+# a missing one is looked up again so adding it later takes effect
+_openai_api_key = None
+
 def get_openai_api_key():
-    """Get OpenAI API key from environment or secrets"""
+    """Get OpenAI API key from environment or secrets, remembering it once found"""
+    global _openai_api_key
+    if _openai_api_key:
+        return _openai_api_key
+    
+    api_key = _lookup_openai_api_key()
+    if api_key and api_key != "your-api-key-here":
+        _openai_api_key = api_key
+    return api_key
+
+def _lookup_openai_api_key():
+    """Read the OpenAI API key from Streamlit secrets or the environment"""
     try:
         # Try to get from Streamlit secrets first
         if hasattr(st, 'secrets') and st.secrets:
@@ -59,19 +111,44 @@ def get_openai_api_key():
     except Exception:
         return os.getenv("OPENAI_API_KEY", "")
 
+@lru_cache(maxsize=1)
+def get_openai_client(api_key):
+    """OpenAI client for a key, shared by every analysis so its connection pool is reused"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+# Set once the Arabic fonts are registered; missing files are checked
+# again on the next report, so fonts installed later are picked up
+_arabic_fonts_registered = False
+
+def _register_arabic_font_files():
+    """Register the Noto Naskh Arabic fonts once per process; False if the files are missing"""
+    global _arabic_fonts_registered
+    if _arabic_fonts_registered:
+        return True
+    
+    # Check if font files exist
+    if not os.path.exists(AR_FONT_REGULAR_PATH) or not os.path.exists(AR_FONT_BOLD_PATH):
+        return False
+    
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    
+    # Parsing the TTFs is expensive, so only do it the first time in this process
+    if AR_FONT_REGULAR not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(AR_FONT_REGULAR, AR_FONT_REGULAR_PATH))
+        pdfmetrics.registerFont(TTFont(AR_FONT_BOLD, AR_FONT_BOLD_PATH))
+    _arabic_fonts_registered = True
+    return True
+
 def register_arabic_fonts():
     """Register Arabic fonts for PDF generation"""
     try:
-                # Check if font files exist
-        if not os.path.exists(AR_FONT_REGULAR_PATH) or not os.path.exists(AR_FONT_BOLD_PATH):
+        if not _register_arabic_font_files():
             st.warning("ملفات الخطوط العربية غير موجودة")
             st.info("سيتم استخدام خطوط النظام المتاحة")
             return get_system_fallback_font()
         
-        # Try to register the Noto Naskh Arabic fonts
-        pdfmetrics.registerFont(TTFont(AR_FONT_REGULAR, AR_FONT_REGULAR_PATH))
-        pdfmetrics.registerFont(TTFont(AR_FONT_BOLD, AR_FONT_BOLD_PATH))
-        
         st.success("✅ تم تسجيل الخطوط العربية بنجاح!")
         return True
         
@@ -80,8 +157,12 @@ def register_arabic_fonts():
         st.info("💡 سيتم استخدام خطوط النظام المتاحة")
         return get_system_fallback_font()
 
-def get_system_fallback_font():
-    """Get the best available system font for Arabic support"""
+@lru_cache(maxsize=1)
+def _register_system_fallback_font():
+    """Register the first available system font, once per process, and return its name"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    
     system_fonts = [
         # macOS fonts
         ('/System/Library/Fonts/Arial.ttf', 'Arial'),
@@ -101,15 +182,22 @@ def get_system_fallback_font():
         try:
             if os.path.exists(font_path):
                 pdfmetrics.registerFont(TTFont(font_name, font_path))
-                st.info(f"💡 تم استخدام خط النظام: {font_name}")
                 return font_name
         except:
             continue
     
     # Last resort - use default Helvetica
-    st.warning("⚠️ استخدام خط النظام: Helvetica")
     return 'Helvetica'
 
+def get_system_fallback_font():
+    """Get the best available system font for Arabic support"""
+    font_name = _register_system_fallback_font()
+    if font_name == 'Helvetica':
+        st.warning("⚠️ استخدام خط النظام: Helvetica")
+    else:
+        st.info(f"💡 تم استخدام خط النظام: {font_name}")
+    return font_name
+
 # Page configuration
 st.set_page_config(
     page_title="نظام بطاقة الوصف المهني",
@@ -119,7 +207,7 @@ st.set_page_config(
 )
 
 # Custom CSS for RTL and corporate styling
-st.markdown("""
+APP_CSS = """
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Cairo:wght@300;400;600;700&display=swap');
     
@@ -273,102 +361,118 @@ st.markdown("""
         box-shadow: 0 6px 12px rgba(0,0,0,0.2) !important;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Streamlit drops elements a rerun does not re-emit, so the stylesheet has to be
+# sent every run; collapse its whitespace once so each copy is smaller
+APP_CSS = " ".join(APP_CSS.split())
+
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 def initialize_session_state():
     """Initialize session state for form data"""
     if 'form_data' not in st.session_state:
-        st.session_state.form_data = {
-            'ref_data': {
-                'main_group': '',
-                'main_group_code': '',
-                'sub_group': '',
-                'sub_group_code': '',
-                'secondary_group': '',
-                'secondary_group_code': '',
-                'unit_group': '',
-                'unit_group_code': '',
-                'job': '',
-                'job_code': '',
-                'work_location': '',
-                'grade': ''
-            },
-            'summary': '',
-            'internal_communications': [{'entity': '', 'purpose': ''}],
-            'external_communications': [{'entity': '', 'purpose': ''}],
-            'job_levels': [{'level': '', 'code': '', 'role': '', 'progression': ''}],
-            'behavioral_competencies': [{'name': '', 'level': ''}],
-            'core_competencies': [{'name': '', 'level': ''}],
-            'leadership_competencies': [{'name': '', 'level': ''}],
-            'technical_competencies': [{'name': '', 'level': ''}],
-            'leadership_tasks': [''],
-            'specialized_tasks': [''],
-            'other_tasks': [''],
-            'behavioral_table': [{'number': 1, 'name': '', 'level': ''}],
-            'technical_table': [{'number': 1, 'name': '', 'level': ''}],
-            'kpis': [{'number': 1, 'metric': '', 'measure': ''}]
-        }
-
-def add_row(data_list: List, template: Dict = None):
-    """Add a new row to a repeatable section"""
-    if template is None:
-        template = {}
-    data_list.append(template.copy())
-    st.rerun()
-
-def remove_row(data_list: List, index: int):
-    """Remove a row from a repeatable section"""
-    if len(data_list) > 1:
-        data_list.pop(index)
-        st.rerun()
+        st.session_state.form_data = copy.deepcopy(EMPTY_FORM)
+
+# Editable grid columns for the repeatable sections, as field -> label
+COMMUNICATION_COLUMNS = {'entity': "الجهة", 'purpose': "الغرض من التواصل"}
+JOB_LEVEL_COLUMNS = {
+    'level': "مستوى المهنة القياسي",
+    'code': "رمز المستوى المهني",
+    'role': "الدور المهني",
+    'progression': "التدرج المهني",
+}
+COMPETENCY_COLUMNS = {'name': "الجدارة", 'level': "مستوى الإتقان"}
+KPI_COLUMNS = {'metric': "مؤشرات الأداء الرئيسية", 'measure': "طريقة القياس"}
+
+def editor_base(key: str, build):
+    """Return a section's rows and the frame its data editor starts from.
+    
+    The frame is kept in session state so the editor sees the same input on
+    every rerun and applies the user's edits to it. It is rebuilt only when
+    the section's list is replaced (AI fill, reset), since edits are written
+    back into the existing list.
+    """
+    rows = st.session_state.form_data[key]
+    base_key = f"_{key}_editor_base"
+    base = st.session_state.get(base_key)
+    if base is None or base[0] is not rows:
+        base = (rows, build(rows))
+        st.session_state[base_key] = base
+    return rows, base[1]
+
+def render_rows_editor(key: str, columns: Dict[str, str], numbered: bool = False):
+    """Render a list-of-dicts section as one editable grid.
+    
+    Numbered sections get a read-only 'number' column for display only; row
+    numbers are derived from list position when the form is exported, so
+    they are never stored in the rows.
+    """
+    def build(rows):
+        frame = pd.DataFrame(rows, columns=list(columns)).fillna('').astype(str)
+        if numbered:
+            frame.insert(0, 'number', range(1, len(frame) + 1))
+        return frame
+    
+    rows, base = editor_base(key, build)
+    column_config = {name: st.column_config.TextColumn(label) for name, label in columns.items()}
+    if numbered:
+        column_config['number'] = st.column_config.NumberColumn("الرقم", disabled=True)
+    edited = st.data_editor(
+        base,
+        num_rows="dynamic",
+        hide_index=True,
+        column_config=column_config,
+        key=f"{key}_editor"
+    )
+    rows[:] = edited[list(columns)].fillna('').to_dict('records')
+
+def render_tasks_editor(key: str):
+    """Render a list-of-strings task section as a one-column editable grid"""
+    rows, base = editor_base(
+        key, lambda rows: pd.DataFrame({'task': rows}, columns=['task']).fillna('').astype(str)
+    )
+    edited = st.data_editor(
+        base,
+        num_rows="dynamic",
+        hide_index=True,
+        column_config={'task': st.column_config.TextColumn("المهمة")},
+        key=f"{key}_editor"
+    )
+    rows[:] = edited['task'].fillna('').tolist()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def extract_text_from_bytes(file_bytes: bytes, file_extension: str):
+    """Extract text from an uploaded file's contents, cached on the bytes"""
+    if file_extension == '.pdf':
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+        return "".join(f"{page.extract_text() or ''}\n" for page in pdf_reader.pages)
+    
+    elif file_extension == '.docx':
+        import docx
+        doc = docx.Document(io.BytesIO(file_bytes))
+        return "".join(f"{paragraph.text}\n" for paragraph in doc.paragraphs)
+    
+    elif file_extension == '.txt':
+        return str(file_bytes, "utf-8")
+    
+    else:
+        return None
 
 def extract_text_from_file(uploaded_file):
     """Extract text from uploaded file (PDF, DOCX, or TXT)"""
     try:
         file_extension = Path(uploaded_file.name).suffix.lower()
-        
-        if file_extension == '.pdf':
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        
-        elif file_extension == '.docx':
-            doc = docx.Document(uploaded_file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        
-        elif file_extension == '.txt':
-            return str(uploaded_file.read(), "utf-8")
-        
-        else:
-            return None
+        return extract_text_from_bytes(uploaded_file.getvalue(), file_extension)
             
     except Exception as e:
         st.error(f"خطأ في قراءة الملف: {str(e)}")
         return None
 
-def analyze_job_description_with_ai(text_content):
-    """Use OpenAI to analyze job description and extract relevant information"""
-    # Check if API key is available
-    api_key = get_openai_api_key()
-    if not api_key or api_key == "your-api-key-here":
-        st.error("❌ مفتاح API الخاص بـ OpenAI غير متوفر")
-        st.info("💡 يرجى إضافة مفتاح API في متغيرات البيئة أو ملف Streamlit secrets")
-        return None
-    
-    try:
-        # Show progress
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        status_text.text("🔄 جاري إعداد طلب AI...")
-        progress_bar.progress(20)
-        
-        system_prompt = """You are an expert in analyzing job descriptions. Analyze the provided text and extract the following information in a structured JSON format.
+# Model and instructions for the job description analysis
+OPENAI_MODEL = "gpt-4o-mini"
+AI_SYSTEM_PROMPT = """You are an expert in analyzing job descriptions. Analyze the provided text and extract the following information in a structured JSON format.
 
 CRITICAL: You must return ONLY a valid JSON object with this exact structure. Do not include any explanations, markdown formatting, or additional text.
 
@@ -429,41 +533,92 @@ RULES:
 3. Ensure all arrays have at least one item
 4. Use Arabic text for values when appropriate
 5. No markdown, no explanations, no additional text"""
-        
+
+# Extracted text is compacted before it is sent: runs of spaces, tabs and form
+# feeds become one space, blank lines are dropped, and the result is capped
+AI_MAX_INPUT_CHARS = 16000
+_INLINE_WS = re.compile(r'[^\S\n]+')
+_BLANK_LINES = re.compile(r'\s*\n\s*')
+
+def compact_text(text_content):
+    """Whitespace-normalized, length-capped copy of an extracted document"""
+    text = _INLINE_WS.sub(' ', text_content)
+    return _BLANK_LINES.sub('\n', text).strip()[:AI_MAX_INPUT_CHARS]
+
+# AI analyses from this session, keyed by a hash of the model, prompt and text
+AI_CACHE_KEY = '_ai_cache'
+
+def ai_cache_key(text_content):
+    """Content hash of an analysis request"""
+    payload = f"{OPENAI_MODEL}\0{AI_SYSTEM_PROMPT}\0{text_content}".encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def analyze_job_description_with_ai(text_content):
+    """Use OpenAI to analyze job description and extract relevant information"""
+    # Check if API key is available
+    api_key = get_openai_api_key()
+    if not api_key or api_key == "your-api-key-here":
+        st.error("❌ مفتاح API الخاص بـ OpenAI غير متوفر")
+        st.info("💡 يرجى إضافة مفتاح API في متغيرات البيئة أو ملف Streamlit secrets")
+        return None
+    
+    text_content = compact_text(text_content)
+    
+    # Re-analyzing the same text (e.g. after a rerun) reuses the earlier result
+    ai_cache = st.session_state.setdefault(AI_CACHE_KEY, {})
+    cache_key = ai_cache_key(text_content)
+    if cache_key in ai_cache:
+        return ai_cache[cache_key]
+    
+    try:
         user_prompt = f"Analyze this job description text and extract the information in the exact JSON format specified:\n\n{text_content}"
         
-        status_text.text(" جاري إرسال الطلب إلى OpenAI...")
-        progress_bar.progress(40)
-        
-        client = OpenAI(api_key=get_openai_api_key())
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=3000,
-            temperature=0.1
-        )
-        
-        status_text.text(" تم استلام الرد من AI...")
-        progress_bar.progress(80)
-        
-        result = response.choices[0].message.content.strip()
-        
-        # Try to clean the response to extract JSON
-        if result.startswith('```json'):
-            result = result.replace('```json', '').replace('```', '').strip()
-        elif result.startswith('```'):
-            result = result.replace('```', '').strip()
-        
-        status_text.text(" تم الانتهاء من التحليل!")
-        progress_bar.progress(100)
-        
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
-        
+        # JSON mode guarantees a bare JSON object, so no markdown fences to strip;
+        # streaming lets the status line follow the reply as it arrives
+        status_text = st.empty()
+        # The status line is cleared even if the stream fails partway
+        try:
+            with st.spinner("🤖 جاري التحليل..."):
+                client = get_openai_client(api_key)
+                response = client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": AI_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=3000,
+                    temperature=0.1,
+                    response_format={"type": "json_object"},
+                    stream=True
+                )
+            
+                parts = []
+                received = 0
+                for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    received += len(delta)
+                    if len(parts) % 25 == 0:
+                        status_text.text(f"📥 جاري استلام الرد من AI... ({received} حرف)")
+        finally:
+            status_text.empty()
+        
+        result = "".join(parts).strip()
+        
+        # Only cache replies the form can be filled from, so asking again
+        # after a malformed reply really calls the API again
+        json_text = extract_json_object(result)
+        if json_text is not None:
+            try:
+                json_loads(json_text)
+            except json.JSONDecodeError:
+                pass
+            else:
+                ai_cache[cache_key] = result
         return result
         
     except Exception as e:
@@ -478,13 +633,64 @@ RULES:
                             st.error(f"خطأ غير متوقع: {error_msg}")
         return None
 
+def extract_json_object(text):
+    """Return the first balanced {...} block in text, or None.
+    
+    Braces inside JSON strings (including escaped quotes) are skipped, so
+    commentary around the object or nested objects do not cut it short.
+    """
+    stripped = text.strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        # JSON mode replies are a bare object; no need to scan them
+        return stripped
+    
+    start = text.find('{')
+    if start < 0:
+        return None
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+# Auto-fill summary lines for the repeatable sections, as (key, label, predicate)
+AI_FILL_SUMMARY = (
+    ('internal_communications', "قناة تواصل داخلية", has_communication),
+    ('external_communications', "قناة تواصل خارجية", has_communication),
+    ('job_levels', "مستوى وظيفي", has_job_level),
+    ('behavioral_competencies', "كفاءة سلوكية", has_competency),
+    ('core_competencies', "كفاءة أساسية", has_competency),
+    ('leadership_competencies', "كفاءة قيادية", has_competency),
+    ('technical_competencies', "كفاءة تقنية", has_competency),
+    ('leadership_tasks', "مهمة قيادية", bool),
+    ('specialized_tasks', "مهمة متخصصة", bool),
+    ('other_tasks', "مهمة أخرى", bool),
+    ('kpis', "مؤشر أداء", has_kpi),
+)
+
 def auto_fill_form_with_ai(ai_analysis):
     """Auto-fill the form with AI analysis results"""
     try:
-        # Try to parse the AI response as JSON
-        if ai_analysis and ai_analysis.strip().startswith('{'):
+        # Try to parse the AI response as JSON, ignoring any text around the object
+        json_text = extract_json_object(ai_analysis) if ai_analysis else None
+        if json_text:
             try:
-                parsed_data = json.loads(ai_analysis)
+                parsed_data = json_loads(json_text)
                 
                 # Show what was extracted
                 st.success("تم تحليل النص بنجاح! جاري ملء النموذج...")
@@ -492,99 +698,32 @@ def auto_fill_form_with_ai(ai_analysis):
 
                 
                 # Update form data with AI results
+                form_data = st.session_state.form_data
                 if 'ref_data' in parsed_data:
-                    st.session_state.form_data['ref_data'].update(parsed_data['ref_data'])
-                if 'summary' in parsed_data:
-                    st.session_state.form_data['summary'] = parsed_data['summary']
-                if 'internal_communications' in parsed_data:
-                    st.session_state.form_data['internal_communications'] = parsed_data['internal_communications']
-                if 'external_communications' in parsed_data:
-                    st.session_state.form_data['external_communications'] = parsed_data['external_communications']
-                if 'job_levels' in parsed_data:
-                    st.session_state.form_data['job_levels'] = parsed_data['job_levels']
-                if 'behavioral_competencies' in parsed_data:
-                    st.session_state.form_data['behavioral_competencies'] = parsed_data['behavioral_competencies']
-                if 'core_competencies' in parsed_data:
-                    st.session_state.form_data['core_competencies'] = parsed_data['core_competencies']
-                if 'leadership_competencies' in parsed_data:
-                    st.session_state.form_data['leadership_competencies'] = parsed_data['leadership_competencies']
-                if 'technical_competencies' in parsed_data:
-                    st.session_state.form_data['technical_competencies'] = parsed_data['technical_competencies']
-                if 'leadership_tasks' in parsed_data:
-                    st.session_state.form_data['leadership_tasks'] = parsed_data['leadership_tasks']
-                if 'specialized_tasks' in parsed_data:
-                    st.session_state.form_data['specialized_tasks'] = parsed_data['specialized_tasks']
-                if 'other_tasks' in parsed_data:
-                    st.session_state.form_data['other_tasks'] = parsed_data['other_tasks']
-                if 'behavioral_table' in parsed_data:
-                    st.session_state.form_data['behavioral_table'] = parsed_data['behavioral_table']
-                if 'technical_table' in parsed_data:
-                    st.session_state.form_data['technical_table'] = parsed_data['technical_table']
-                if 'kpis' in parsed_data:
-                    st.session_state.form_data['kpis'] = parsed_data['kpis']
+                    form_data['ref_data'].update(parsed_data['ref_data'])
+                for key in AI_FILL_KEYS:
+                    if key in parsed_data:
+                        form_data[key] = parsed_data[key]
                 
                 st.success("تم ملء النموذج تلقائياً!")
                 
                 # Store AI analysis for PDF generation
-                st.session_state['last_ai_analysis'] = ai_analysis
+                st.session_state['last_ai_analysis'] = json_text
                 
                 # Show summary of what was filled
-                st.markdown("### ملخص ما تم ملؤه:")
                 summary_items = []
                 if 'ref_data' in parsed_data:
                     filled_refs = sum(1 for v in parsed_data['ref_data'].values() if v)
                     summary_items.append(f"• {filled_refs} من البيانات المرجعية")
                 if 'summary' in parsed_data and parsed_data['summary']:
                     summary_items.append("• ملخص الوظيفة")
-                if 'internal_communications' in parsed_data:
-                    filled_comms = sum(1 for c in parsed_data['internal_communications'] if any(c.values()))
-                    if filled_comms > 0:
-                        summary_items.append(f"• {filled_comms} قناة تواصل داخلية")
-                if 'external_communications' in parsed_data:
-                    filled_comms = sum(1 for c in parsed_data['external_communications'] if any(c.values()))
-                    if filled_comms > 0:
-                        summary_items.append(f"• {filled_comms} قناة تواصل خارجية")
-                if 'job_levels' in parsed_data:
-                    filled_levels = sum(1 for l in parsed_data['job_levels'] if any(l.values()))
-                    if filled_levels > 0:
-                        summary_items.append(f"• {filled_levels} مستوى وظيفي")
-                if 'behavioral_competencies' in parsed_data:
-                    filled_comps = sum(1 for c in parsed_data['behavioral_competencies'] if any(c.values()))
-                    if filled_comps > 0:
-                        summary_items.append(f"• {filled_comps} كفاءة سلوكية")
-                if 'core_competencies' in parsed_data:
-                    filled_comps = sum(1 for c in parsed_data['core_competencies'] if any(c.values()))
-                    if filled_comps > 0:
-                        summary_items.append(f"• {filled_comps} كفاءة أساسية")
-                if 'leadership_competencies' in parsed_data:
-                    filled_comps = sum(1 for c in parsed_data['leadership_competencies'] if any(c.values()))
-                    if filled_comps > 0:
-                        summary_items.append(f"• {filled_comps} كفاءة قيادية")
-                if 'technical_competencies' in parsed_data:
-                    filled_comps = sum(1 for c in parsed_data['technical_competencies'] if any(c.values()))
-                    if filled_comps > 0:
-                        summary_items.append(f"• {filled_comps} كفاءة تقنية")
-                if 'leadership_tasks' in parsed_data:
-                    filled_tasks = sum(1 for t in parsed_data['leadership_tasks'] if t)
-                    if filled_tasks > 0:
-                        summary_items.append(f"• {filled_tasks} مهمة قيادية")
-                if 'specialized_tasks' in parsed_data:
-                    filled_tasks = sum(1 for t in parsed_data['specialized_tasks'] if t)
-                    if filled_tasks > 0:
-                        summary_items.append(f"• {filled_tasks} مهمة متخصصة")
-                if 'other_tasks' in parsed_data:
-                    filled_tasks = sum(1 for t in parsed_data['other_tasks'] if t)
-                    if filled_tasks > 0:
-                        summary_items.append(f"• {filled_tasks} مهمة أخرى")
-                if 'kpis' in parsed_data:
-                    filled_kpis = sum(1 for k in parsed_data['kpis'] if any(k.values()))
-                    if filled_kpis > 0:
-                        summary_items.append(f"• {filled_kpis} مؤشر أداء")
-                
-                for item in summary_items:
-                    st.write(item)
+                for key, label, pred in AI_FILL_SUMMARY:
+                    filled = sum(1 for item in parsed_data.get(key, ()) if pred(item))
+                    if filled > 0:
+                        summary_items.append(f"• {filled} {label}")
                 
-
+                # One markdown element for the whole summary, with hard line breaks
+                st.markdown("### ملخص ما تم ملؤه:\n\n" + "  \n".join(summary_items))
                 
                 st.rerun()
                 
@@ -621,13 +760,14 @@ def auto_fill_form_with_ai(ai_analysis):
 }"""
                     
                     try:
-                        # Get the original text from session state
-                        original_text = st.session_state.get('last_analyzed_text', '')
+                        # Get the original text from session state, compacted and
+                        # capped the same way as for the first analysis
+                        original_text = compact_text(st.session_state.get('last_analyzed_text', ''))
                         if not original_text:
                             st.error("لا يمكن العثور على النص الأصلي")
                             return
                         
-                        client = openai.OpenAI(api_key=get_openai_api_key())
+                        client = get_openai_client(get_openai_api_key())
                         retry_response = client.chat.completions.create(
                             model="gpt-3.5-turbo",
                             messages=[
@@ -635,12 +775,11 @@ def auto_fill_form_with_ai(ai_analysis):
                                 {"role": "user", "content": f"Analyze: {original_text}"}
                             ],
                             max_tokens=2000,
-                            temperature=0.1
+                            temperature=0.1,
+                            response_format={"type": "json_object"}
                         )
                         
                         retry_result = retry_response.choices[0].message.content.strip()
-                        if retry_result.startswith('```'):
-                            retry_result = retry_result.replace('```json', '').replace('```', '').strip()
                         
                         st.success("تم إعادة المحاولة!")
                         auto_fill_form_with_ai(retry_result)
@@ -656,43 +795,40 @@ def auto_fill_form_with_ai(ai_analysis):
         st.error(f"خطأ في ملء النموذج: {str(e)}")
         st.info("يرجى المحاولة مرة أخرى")
 
-def process_arabic_text(text):
-    """Process Arabic text for proper display in PDF"""
-    if not text or not isinstance(text, str):
-        return text
-    
-    try:
-        # Reshape Arabic text
-        reshaped_text = arabic_reshaper.reshape(text)
-        # Apply bidirectional algorithm for RTL text
-        bidi_text = get_display(reshaped_text)
-        return bidi_text
-    except:
-        return text
-
-def A(text):
-    """Short alias for process_arabic_text to keep code tidy"""
-    return process_arabic_text(text)
+# Size above which a PDF being built spills from memory to disk
+PDF_SPOOL_MAX_SIZE = 8 << 20
+
+# Horizontal rule printed above the PDF footer
+PDF_FOOTER_RULE = "─" * 50
+
+@lru_cache(maxsize=32)
+def summarize_ai_analysis(ai_analysis):
+    """Parse an AI analysis once and return (summary, competency count, task count)"""
+    ai_data = json_loads(ai_analysis)
+    total_competencies = sum(1 for k in COMPETENCY_KEYS for c in ai_data.get(k, ()) if has_competency(c))
+    total_tasks = sum(1 for k in TASK_KEYS for t in ai_data.get(k, ()) if t)
+    return ai_data.get('summary'), total_competencies, total_tasks
 
 def generate_docx_report(form_data, ai_analysis=None):
     """Generate a professional DOCX form template from form data"""
-    # DOCX generation is now handled by docx_generator.py module
-    try:
-        doc = generate_docx_from_module(form_data)
-        if doc:
-            # Save the document to bytes
-            docx_bytes = io.BytesIO()
-            doc.save(docx_bytes)
-            docx_bytes.seek(0)
-            return docx_bytes.getvalue()
-        else:
-            return None
-    except Exception as e:
-        st.error(f"خطأ في إنشاء التقرير DOCX: {str(e)}")
-        return None
+    # DOCX generation is now handled by docx_generator.py module; errors are
+    # left to the caller so a failed build is never cached by build_docx
+    from docx_generator import generate_docx_report as generate_docx_from_module
+    doc = generate_docx_from_module(form_data)
+    
+    # Save the document to bytes; getvalue() trims the buffer in place and
+    # hands it over without copying, as long as nothing writes to it after
+    docx_bytes = io.BytesIO()
+    doc.save(docx_bytes)
+    return docx_bytes.getvalue()
 
 def generate_pdf_report(form_data, ai_analysis=None):
     """Generate a professional PDF report from form data and AI analysis"""
+    # Only loaded once a PDF is actually built; the form itself never needs them
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+    from pdf_sections import A, label_paragraph, build_pdf_styles, section_views, PDF_SECTION_BUILDERS
+    
     try:
         # Check if fonts are available and register them
         font_result = register_arabic_fonts()
@@ -712,383 +848,81 @@ def generate_pdf_report(form_data, ai_analysis=None):
             st.warning(f"⚠️ استخدام خط النظام: {font_result}")
             st.info("💡 للحصول على دعم كامل للعربية، قم بتثبيت الخطوط يدوياً")
         
-        # Create a BytesIO buffer for the PDF
-        buffer = io.BytesIO()
+        # Spool the PDF in memory, rolling over to disk for very large reports
+        buffer = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE, mode='w+b')
         
         # Create the PDF document
         doc = SimpleDocTemplate(buffer, pagesize=A4)
         story = []
         
-        # Get styles
-        styles = getSampleStyleSheet()
-        
-        # Create custom styles for Arabic text
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontName=arabic_font_bold,
-            fontSize=24,
-            alignment=TA_CENTER,
-            spaceAfter=30,
-            textColor=colors.darkblue
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontName=arabic_font,
-            fontSize=14,
-            alignment=TA_CENTER,
-            spaceAfter=20,
-            textColor=colors.gray
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontName=arabic_font_bold,
-            fontSize=16,
-            alignment=TA_RIGHT,
-            spaceAfter=12,
-            textColor=colors.darkblue,
-            borderWidth=1,
-            borderColor=colors.darkblue,
-            borderPadding=5,
-            backColor=colors.lightblue
-        )
-        
-        subheading_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading3'],
-            fontName=arabic_font_bold,
-            fontSize=13,
-            alignment=TA_RIGHT,
-            spaceAfter=8,
-            textColor=colors.black
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontName=arabic_font,
-            fontSize=12,
-            alignment=TA_RIGHT,
-            spaceAfter=6
-        )
-        
-        highlight_style = ParagraphStyle(
-            'CustomHighlight',
-            parent=styles['Normal'],
-            fontName=arabic_font_bold,
-            fontSize=12,
-            alignment=TA_RIGHT,
-            textColor=colors.darkred,
-            spaceAfter=6
-        )
+        # Paragraph styles are built once per font pair and shared across reports
+        pdf_styles = build_pdf_styles(arabic_font, arabic_font_bold)
+        title_style = pdf_styles['title']
+        subtitle_style = pdf_styles['subtitle']
+        heading_style = pdf_styles['heading']
+        normal_style = pdf_styles['normal']
+        highlight_style = pdf_styles['highlight']
         
         # Title
-        story.append(Paragraph(A("نظام بطاقة الوصف المهني"), title_style))
-        story.append(Paragraph("Professional Job Description Card System", subtitle_style))
+        story.append(label_paragraph("نظام بطاقة الوصف المهني", title_style))
+        story.append(label_paragraph("Professional Job Description Card System", subtitle_style))
         story.append(Spacer(1, 30))
         
         # Add timestamp
-        from datetime import datetime
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        current_time = datetime.now().strftime(REPORT_TIME_FMT)
         story.append(Paragraph(A(f"تاريخ الإنشاء: {current_time}"), normal_style))
         story.append(Spacer(1, 20))
         
-        # Reference Data Section
-        story.append(Paragraph(A("أ‌- البيانات المرجعية للمهنة"), heading_style))
-        story.append(Spacer(1, 10))
-        
-        ref_data = form_data.get('ref_data', {})
-        ref_table_data = [
-            [A("المجال"), A("القيمة")],
-            [A("المجموعة الرئيسية"), A(ref_data.get('main_group', ''))],
-            [A("رمز المجموعة الرئيسية"), A(ref_data.get('main_group_code', ''))],
-            [A("المجموعة الفرعية"), A(ref_data.get('sub_group', ''))],
-            [A("رمز المجموعة الفرعية"), A(ref_data.get('sub_group_code', ''))],
-            [A("المجموعة الثانوية"), A(ref_data.get('secondary_group', ''))],
-            [A("رمز المجموعة الثانوية"), A(ref_data.get('secondary_group_code', ''))],
-            [A("مجموعة الوحدات"), A(ref_data.get('unit_group', ''))],
-            [A("رمز الوحدات"), A(ref_data.get('unit_group_code', ''))],
-            [A("المهنة"), A(ref_data.get('job', ''))],
-            [A("رمز المهنة"), A(ref_data.get('job_code', ''))],
-            [A("موقع العمل"), A(ref_data.get('work_location', ''))],
-            [A("المرتبة"), A(ref_data.get('grade', ''))]
-        ]
-        
-        ref_table = Table(ref_table_data, colWidths=[2.5*inch, 3.5*inch])
-        ref_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-            ('GRID', (0, 0), (-1, -1), 1, colors.darkblue),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightblue, colors.white]),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, -1), arabic_font)
-        ]))
-        story.append(ref_table)
-        story.append(Spacer(1, 25))
-        
-        # Summary Section
-        if form_data.get('summary'):
-            story.append(Paragraph(A("ب‌- ملخص الوظيفة"), heading_style))
-            story.append(Spacer(1, 10))
-            
-            # Add summary in a highlighted box
-            summary_text = form_data.get('summary', '')
-            if summary_text:
-                story.append(Paragraph(A(f"الملخص: {summary_text}"), highlight_style))
-            story.append(Spacer(1, 25))
-        
-        # Communications Section
-        story.append(Paragraph(A("ج‌- قنوات التواصل"), heading_style))
-        story.append(Spacer(1, 10))
-        
-        # Internal Communications
-        story.append(Paragraph(A("التواصل الداخلي:"), subheading_style))
-        internal_comms = form_data.get('internal_communications', [])
-        if internal_comms and any(any(comm.values()) for comm in internal_comms):
-            for i, comm in enumerate(internal_comms, 1):
-                if any(comm.values()):
-                    story.append(Paragraph(A(f"• {comm.get('entity', '')} - {comm.get('purpose', '')}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 15))
-        
-        # External Communications
-        story.append(Paragraph(A("التواصل الخارجي:"), subheading_style))
-        external_comms = form_data.get('external_communications', [])
-        if external_comms and any(any(comm.values()) for comm in external_comms):
-            for i, comm in enumerate(external_comms, 1):
-                if any(comm.values()):
-                    story.append(Paragraph(A(f"• {comm.get('entity', '')} - {comm.get('purpose', '')}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 25))
-        
-        # Job Levels Section
-        story.append(Paragraph(A("د‌- مستويات الوظيفة"), heading_style))
-        story.append(Spacer(1, 10))
-        
-        job_levels = form_data.get('job_levels', [])
-        if job_levels and any(any(level.values()) for level in job_levels):
-            level_table_data = [[A("المستوى"), A("الرمز"), A("الدور"), A("التقدم")]]
-            for level in job_levels:
-                if any(level.values()):
-                    level_table_data.append([
-                        A(level.get('level', '')),
-                        A(level.get('code', '')),
-                        A(level.get('role', '')),
-                        A(level.get('progression', ''))
-                    ])
-            
-            level_table = Table(level_table_data, colWidths=[1.5*inch, 1*inch, 2*inch, 1.5*inch])
-            level_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-            ('GRID', (0, 0), (-1, -1), 1, colors.darkgreen),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightgreen, colors.white]),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, -1), arabic_font)
-            ]))
-            story.append(level_table)
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 25))
-        
-        # Competencies Section
-        story.append(Paragraph(A("هـ- الكفاءات المطلوبة"), heading_style))
-        story.append(Spacer(1, 10))
-        
-        # Behavioral Competencies
-        story.append(Paragraph(A("الكفاءات السلوكية:"), subheading_style))
-        behavioral_comps = form_data.get('behavioral_competencies', [])
-        if behavioral_comps and any(any(comp.values()) for comp in behavioral_comps):
-            for i, comp in enumerate(behavioral_comps, 1):
-                if any(comp.values()):
-                    story.append(Paragraph(A(f"• {comp.get('name', '')} - المستوى: {comp.get('level', '')}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 15))
-        
-        # Core Competencies
-        story.append(Paragraph(A("الكفاءات الأساسية:"), subheading_style))
-        core_comps = form_data.get('core_competencies', [])
-        if core_comps and any(any(comp.values()) for comp in core_comps):
-            for i, comp in enumerate(core_comps, 1):
-                if any(comp.values()):
-                    story.append(Paragraph(A(f"• {comp.get('name', '')} - المستوى: {comp.get('level', '')}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 15))
-        
-        # Leadership Competencies
-        story.append(Paragraph(A("الكفاءات القيادية:"), subheading_style))
-        leadership_comps = form_data.get('leadership_competencies', [])
-        if leadership_comps and any(any(comp.values()) for comp in leadership_comps):
-            for i, comp in enumerate(leadership_comps, 1):
-                if any(comp.values()):
-                    story.append(Paragraph(A(f"• {comp.get('name', '')} - المستوى: {comp.get('level', '')}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 15))
-        
-        # Technical Competencies
-        story.append(Paragraph(A("الكفاءات التقنية:"), subheading_style))
-        technical_comps = form_data.get('technical_competencies', [])
-        if technical_comps and any(any(comp.values()) for comp in technical_comps):
-            for i, comp in enumerate(technical_comps, 1):
-                if any(comp.values()):
-                    story.append(Paragraph(A(f"• {comp.get('name', '')} - المستوى: {comp.get('level', '')}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 25))
-        
-        # Tasks Section
-        story.append(Paragraph(A("و‌- المهام"), heading_style))
-        story.append(Spacer(1, 10))
-        
-        # Leadership Tasks
-        story.append(Paragraph(A("المهام القيادية:"), subheading_style))
-        leadership_tasks = form_data.get('leadership_tasks', [])
-        if leadership_tasks and any(task for task in leadership_tasks):
-            for i, task in enumerate(leadership_tasks, 1):
-                if task:
-                    story.append(Paragraph(A(f"{i}. {task}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 15))
-        
-        # Specialized Tasks
-        story.append(Paragraph(A("المهام المتخصصة:"), subheading_style))
-        specialized_tasks = form_data.get('specialized_tasks', [])
-        if specialized_tasks and any(task for task in specialized_tasks):
-            for i, task in enumerate(specialized_tasks, 1):
-                if task:
-                    story.append(Paragraph(A(f"{i}. {task}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 15))
-        
-        # Other Tasks
-        story.append(Paragraph(A("المهام الأخرى:"), subheading_style))
-        other_tasks = form_data.get('other_tasks', [])
-        if other_tasks and any(task for task in other_tasks):
-            for i, task in enumerate(other_tasks, 1):
-                if task:
-                    story.append(Paragraph(A(f"{i}. {task}"), normal_style))
-        else:
-            story.append(Paragraph(A("لا توجد بيانات"), normal_style))
-        
-        story.append(Spacer(1, 25))
-        
-        # KPIs Section
-        story.append(Paragraph(A("ز‌- مؤشرات الأداء الرئيسية"), heading_style))
-        story.append(Spacer(1, 10))
-        
-        kpis = form_data.get('kpis', [])
-        if kpis and any(any(kpi.values()) for kpi in kpis):
-            kpi_table_data = [[A("الرقم"), A("المؤشر"), A("القياس")]]
-            for kpi in kpis:
-                if any(kpi.values()):
-                    kpi_table_data.append([
-                        str(kpi.get('number', '')),
-                        A(kpi.get('metric', '')),
-                        A(kpi.get('measure', ''))
-                    ])
-            
-            kpi_table = Table(kpi_table_data, colWidths=[0.5*inch, 2.5*inch, 2*inch])
-            kpi_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                            ('BACKGROUND', (0, 1), (-1, -1), colors.lightcoral),
-            ('GRID', (0, 0), (-1, -1), 1, colors.darkred),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.lightcoral, colors.white]),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, -1), arabic_font)
-            ]))
-            story.append(kpi_table)
-        else:
-            story.append(Paragraph(process_arabic_text("لا توجد بيانات"), normal_style))
+        # Form sections, each built independently from its own part of form_data
+        sections = section_views(form_data)
+        story.extend(chain.from_iterable(
+            build_section(sections, pdf_styles, arabic_font) for build_section in PDF_SECTION_BUILDERS
+        ))
         
         # AI Analysis Section (if available)
         if ai_analysis:
             story.append(PageBreak())
-            story.append(Paragraph(A("تحليل الذكاء الاصطناعي"), title_style))
+            story.append(label_paragraph("تحليل الذكاء الاصطناعي", title_style))
             story.append(Spacer(1, 20))
             
             # Show AI analysis in a formatted way
             try:
-                ai_data = json.loads(ai_analysis)
-                story.append(Paragraph(A("ملخص التحليل:"), heading_style))
+                # Reruns with the same analysis reuse the parsed counts
+                summary, total_competencies, total_tasks = summarize_ai_analysis(ai_analysis)
+                story.append(label_paragraph("ملخص التحليل:", heading_style))
                 story.append(Spacer(1, 10))
                 
                 # Show key insights from AI
-                if 'summary' in ai_data and ai_data['summary']:
-                    story.append(Paragraph(A(f"الملخص: {ai_data['summary']}"), normal_style))
+                if summary:
+                    story.append(Paragraph(A(f"الملخص: {summary}"), normal_style))
                     story.append(Spacer(1, 10))
                 
                 # Show extracted competencies count
-                total_competencies = 0
-                for comp_type in ['behavioral_competencies', 'core_competencies', 'leadership_competencies', 'technical_competencies']:
-                    if comp_type in ai_data:
-                        count = len([c for c in ai_data[comp_type] if any(c.values())])
-                        total_competencies += count
-                
                 if total_competencies > 0:
                     story.append(Paragraph(A(f"إجمالي الكفاءات المستخرجة: {total_competencies}"), highlight_style))
                     story.append(Spacer(1, 10))
                 
                 # Show tasks count
-                total_tasks = 0
-                for task_type in ['leadership_tasks', 'specialized_tasks', 'other_tasks']:
-                    if task_type in ai_data:
-                        count = len([t for t in ai_data[task_type] if t])
-                        total_tasks += count
-                
                 if total_tasks > 0:
                     story.append(Paragraph(A(f"إجمالي المهام المستخرجة: {total_tasks}"), highlight_style))
                 
             except json.JSONDecodeError:
-                story.append(Paragraph(A("تحليل نصي:"), heading_style))
+                story.append(label_paragraph("تحليل نصي:", heading_style))
                 story.append(Paragraph(A(ai_analysis[:1000] + "..." if len(ai_analysis) > 1000 else ai_analysis), normal_style))
         
         # Add footer
         story.append(Spacer(1, 30))
-        story.append(Paragraph("─" * 50, normal_style))
+        story.append(label_paragraph(PDF_FOOTER_RULE, normal_style))
         story.append(Spacer(1, 10))
-        story.append(Paragraph(A("تم إنشاء هذا التقرير بواسطة نظام بطاقة الوصف المهني"), normal_style))
-        story.append(Paragraph("Powered by AI-Powered Job Description System", normal_style))
+        story.append(label_paragraph("تم إنشاء هذا التقرير بواسطة نظام بطاقة الوصف المهني", normal_style))
+        story.append(label_paragraph("Powered by AI-Powered Job Description System", normal_style))
         
         # Build the PDF
         doc.build(story)
         
         # Get the PDF content
-        pdf_content = buffer.getvalue()
+        buffer.seek(0)
+        pdf_content = buffer.read()
         buffer.close()
         
         return pdf_content
@@ -1097,88 +931,101 @@ def generate_pdf_report(form_data, ai_analysis=None):
         st.error(f"❌ خطأ في إنشاء PDF: {str(e)}")
         return None
 
+# Section headers that open a section together with its first subsection,
+# sent to the browser as one markdown element
+REFERENCE_HEADERS_HTML = (
+    '<div class="section-header">أ‌- نموذج بطاقة الوصف المهني</div>'
+    '<div class="subsection-header">1- البيانات المرجعية للمهنة</div>'
+)
+ACTUAL_DESCRIPTION_HEADERS_HTML = (
+    '<div class="section-header">ب‌- نموذج الوصف الفعلي</div>'
+    '<div class="subsection-header">1- المهام</div>'
+)
+
+@st.fragment
 def render_reference_data():
     """Render the reference data section"""
-    st.markdown('<div class="section-header">أ‌- نموذج بطاقة الوصف المهني</div>', unsafe_allow_html=True)
-    st.markdown('<div class="subsection-header">1- البيانات المرجعية للمهنة</div>', unsafe_allow_html=True)
+    st.markdown(REFERENCE_HEADERS_HTML, unsafe_allow_html=True)
     
+    ref_data = st.session_state.form_data['ref_data']
     with st.container():
         col1, col2 = st.columns(2)
         
         with col1:
-            st.session_state.form_data['ref_data']['main_group'] = st.text_input(
+            ref_data['main_group'] = st.text_input(
                 "المجموعة الرئيسية",
-                value=st.session_state.form_data['ref_data']['main_group'],
+                value=ref_data['main_group'],
                 key="main_group"
             )
             
-            st.session_state.form_data['ref_data']['sub_group'] = st.text_input(
+            ref_data['sub_group'] = st.text_input(
                 "المجموعة الفرعية",
-                value=st.session_state.form_data['ref_data']['sub_group'],
+                value=ref_data['sub_group'],
                 key="sub_group"
             )
             
-            st.session_state.form_data['ref_data']['secondary_group'] = st.text_input(
+            ref_data['secondary_group'] = st.text_input(
                 "المجموعة الثانوية",
-                value=st.session_state.form_data['ref_data']['secondary_group'],
+                value=ref_data['secondary_group'],
                 key="secondary_group"
             )
             
-            st.session_state.form_data['ref_data']['unit_group'] = st.text_input(
+            ref_data['unit_group'] = st.text_input(
                 "مجموعة الوحدات",
-                value=st.session_state.form_data['ref_data']['unit_group'],
+                value=ref_data['unit_group'],
                 key="unit_group"
             )
             
-            st.session_state.form_data['ref_data']['job'] = st.text_input(
+            ref_data['job'] = st.text_input(
                 "المهنة *",
-                value=st.session_state.form_data['ref_data']['job'],
+                value=ref_data['job'],
                 key="job"
             )
             
-            st.session_state.form_data['ref_data']['work_location'] = st.text_input(
+            ref_data['work_location'] = st.text_input(
                 "موقع العمل *",
-                value=st.session_state.form_data['ref_data']['work_location'],
+                value=ref_data['work_location'],
                 key="work_location"
             )
         
         with col2:
-            st.session_state.form_data['ref_data']['main_group_code'] = st.text_input(
+            ref_data['main_group_code'] = st.text_input(
                 "رمز المجموعة الرئيسية",
-                value=st.session_state.form_data['ref_data']['main_group_code'],
+                value=ref_data['main_group_code'],
                 key="main_group_code"
             )
             
-            st.session_state.form_data['ref_data']['sub_group_code'] = st.text_input(
+            ref_data['sub_group_code'] = st.text_input(
                 "رمز المجموعة الفرعية",
-                value=st.session_state.form_data['ref_data']['sub_group_code'],
+                value=ref_data['sub_group_code'],
                 key="sub_group_code"
             )
             
-            st.session_state.form_data['ref_data']['secondary_group_code'] = st.text_input(
+            ref_data['secondary_group_code'] = st.text_input(
                 "رمز المجموعة الثانوية",
-                value=st.session_state.form_data['ref_data']['secondary_group_code'],
+                value=ref_data['secondary_group_code'],
                 key="secondary_group_code"
             )
             
-            st.session_state.form_data['ref_data']['unit_group_code'] = st.text_input(
+            ref_data['unit_group_code'] = st.text_input(
                 "رمز الوحدات",
-                value=st.session_state.form_data['ref_data']['unit_group_code'],
+                value=ref_data['unit_group_code'],
                 key="unit_group_code"
             )
             
-            st.session_state.form_data['ref_data']['job_code'] = st.text_input(
+            ref_data['job_code'] = st.text_input(
                 "رمز المهنة",
-                value=st.session_state.form_data['ref_data']['job_code'],
+                value=ref_data['job_code'],
                 key="job_code"
             )
             
-            st.session_state.form_data['ref_data']['grade'] = st.text_input(
+            ref_data['grade'] = st.text_input(
                 "المرتبة",
-                value=st.session_state.form_data['ref_data']['grade'],
+                value=ref_data['grade'],
                 key="grade"
             )
 
+@st.fragment
 def render_summary():
     """Render the job summary section"""
     st.markdown('<div class="subsection-header">2- الملخص العام للمهنة</div>', unsafe_allow_html=True)
@@ -1190,458 +1037,222 @@ def render_summary():
         key="summary"
     )
 
+@st.fragment
 def render_communication_channels():
     """Render the communication channels section"""
     st.markdown('<div class="subsection-header">3- قنوات التواصل</div>', unsafe_allow_html=True)
     
     # Internal communications
     st.markdown("**الجهات الداخلية:**")
-    for i, comm in enumerate(st.session_state.form_data['internal_communications']):
-        with st.container():
-            col1, col2, col3 = st.columns([3, 3, 1])
-            with col1:
-                comm['entity'] = st.text_input(
-                    "الجهة",
-                    value=comm['entity'],
-                    key=f"internal_entity_{i}"
-                )
-            with col2:
-                comm['purpose'] = st.text_input(
-                    "الغرض من التواصل",
-                    value=comm['purpose'],
-                    key=f"internal_purpose_{i}"
-                )
-            with col3:
-                if st.button("حذف", key=f"remove_internal_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['internal_communications'], i)
-                    break
-    
-    if st.button("+ إضافة جهة داخلية", key="add_internal", type="primary"):
-        add_row(st.session_state.form_data['internal_communications'], {'entity': '', 'purpose': ''})
+    render_rows_editor('internal_communications', COMMUNICATION_COLUMNS)
     
     st.markdown("---")
     
     # External communications
     st.markdown("**الجهات الخارجية:**")
-    for i, comm in enumerate(st.session_state.form_data['external_communications']):
-        with st.container():
-            col1, col2, col3 = st.columns([3, 3, 1])
-            with col1:
-                comm['entity'] = st.text_input(
-                    "الجهة",
-                    value=comm['entity'],
-                    key=f"external_entity_{i}"
-                )
-            with col2:
-                comm['purpose'] = st.text_input(
-                    "الغرض من التواصل",
-                    value=comm['purpose'],
-                    key=f"external_purpose_{i}"
-                )
-            with col3:
-                if st.button("حذف", key=f"remove_external_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['external_communications'], i)
-                    break
-    
-    if st.button("+ إضافة جهة خارجية", key="add_external", type="primary"):
-        add_row(st.session_state.form_data['external_communications'], {'entity': '', 'purpose': ''})
+    render_rows_editor('external_communications', COMMUNICATION_COLUMNS)
 
+@st.fragment
 def render_job_levels():
     """Render the job levels section"""
     st.markdown('<div class="subsection-header">4- مستويات المهنة القياسية</div>', unsafe_allow_html=True)
     
-    for i, level in enumerate(st.session_state.form_data['job_levels']):
-        with st.container():
-            col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
-            with col1:
-                level['level'] = st.text_input(
-                    "مستوى المهنة القياسي",
-                    value=level['level'],
-                    key=f"job_level_{i}"
-                )
-            with col2:
-                level['code'] = st.text_input(
-                    "رمز المستوى المهني",
-                    value=level['code'],
-                    key=f"job_code_{i}"
-                )
-            with col3:
-                level['role'] = st.text_input(
-                    "الدور المهني",
-                    value=level['role'],
-                    key=f"job_role_{i}"
-                )
-            with col4:
-                level['progression'] = st.text_input(
-                    "التدرج المهني",
-                    value=level['progression'],
-                    key=f"job_progression_{i}"
-                )
-            with col5:
-                if st.button("حذف", key=f"remove_level_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['job_levels'], i)
-                    break
-    
-    if st.button("+ إضافة مستوى", key="add_level", type="primary"):
-        add_row(st.session_state.form_data['job_levels'], {'level': '', 'code': '', 'role': '', 'progression': ''})
+    render_rows_editor('job_levels', JOB_LEVEL_COLUMNS)
 
+@st.fragment
 def render_competencies():
     """Render the competencies section"""
     st.markdown('<div class="subsection-header">5- الجدارات</div>', unsafe_allow_html=True)
     
     # Behavioral competencies
     st.markdown("**الجدارات السلوكية:**")
-    for i, comp in enumerate(st.session_state.form_data['behavioral_competencies']):
-        with st.container():
-            col1, col2, col3 = st.columns([3, 2, 1])
-            with col1:
-                comp['name'] = st.text_input(
-                    "الجدارة",
-                    value=comp['name'],
-                    key=f"behavioral_name_{i}"
-                )
-            with col2:
-                comp['level'] = st.text_input(
-                    "مستوى الإتقان",
-                    value=comp['level'],
-                    key=f"behavioral_level_{i}"
-                )
-            with col3:
-                if st.button("حذف", key=f"remove_behavioral_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['behavioral_competencies'], i)
-                    break
-    
-    if st.button("+ إضافة جدارة سلوكية", key="add_behavioral", type="primary"):
-        add_row(st.session_state.form_data['behavioral_competencies'], {'name': '', 'level': ''})
+    render_rows_editor('behavioral_competencies', COMPETENCY_COLUMNS)
     
     st.markdown("---")
     
     # Core competencies
     st.markdown("**الجدارات الأساسية:**")
-    for i, comp in enumerate(st.session_state.form_data['core_competencies']):
-        with st.container():
-            col1, col2, col3 = st.columns([3, 2, 1])
-            with col1:
-                comp['name'] = st.text_input(
-                    "الجدارة",
-                    value=comp['name'],
-                    key=f"core_name_{i}"
-                )
-            with col2:
-                comp['level'] = st.text_input(
-                    "مستوى الإتقان",
-                    value=comp['level'],
-                    key=f"core_level_{i}"
-                )
-            with col3:
-                if st.button("حذف", key=f"remove_core_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['core_competencies'], i)
-                    break
-    
-    if st.button("+ إضافة جدارة أساسية", key="add_core", type="primary"):
-        add_row(st.session_state.form_data['core_competencies'], {'name': '', 'level': ''})
+    render_rows_editor('core_competencies', COMPETENCY_COLUMNS)
     
     st.markdown("---")
     
     # Leadership competencies
     st.markdown("**الجدارات القيادية:**")
-    for i, comp in enumerate(st.session_state.form_data['leadership_competencies']):
-        with st.container():
-            col1, col2, col3 = st.columns([3, 2, 1])
-            with col1:
-                comp['name'] = st.text_input(
-                    "الجدارة",
-                    value=comp['name'],
-                    key=f"leadership_name_{i}"
-                )
-            with col2:
-                comp['level'] = st.text_input(
-                    "مستوى الإتقان",
-                    value=comp['level'],
-                    key=f"leadership_level_{i}"
-                )
-            with col3:
-                if st.button("حذف", key=f"remove_leadership_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['leadership_competencies'], i)
-                    break
-    
-    if st.button("+ إضافة جدارة قيادية", key="add_leadership", type="primary"):
-        add_row(st.session_state.form_data['leadership_competencies'], {'name': '', 'level': ''})
+    render_rows_editor('leadership_competencies', COMPETENCY_COLUMNS)
     
     st.markdown("---")
     
     # Technical competencies
     st.markdown("**الجدارات الفنية:**")
-    for i, comp in enumerate(st.session_state.form_data['technical_competencies']):
-        with st.container():
-            col1, col2, col3 = st.columns([3, 2, 1])
-            with col1:
-                comp['name'] = st.text_input(
-                    "الجدارة",
-                    value=comp['name'],
-                    key=f"technical_name_{i}"
-                )
-            with col2:
-                comp['level'] = st.text_input(
-                    "مستوى الإتقان",
-                    value=comp['level'],
-                    key=f"technical_level_{i}"
-                )
-            with col3:
-                if st.button("حذف", key=f"remove_technical_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['technical_competencies'], i)
-                    break
-    
-    if st.button("+ إضافة جدارة فنية", key="add_technical", type="primary"):
-        add_row(st.session_state.form_data['technical_competencies'], {'name': '', 'level': ''})
+    render_rows_editor('technical_competencies', COMPETENCY_COLUMNS)
 
+@st.fragment
 def render_actual_description():
     """Render the actual description section"""
-    st.markdown('<div class="section-header">ب‌- نموذج الوصف الفعلي</div>', unsafe_allow_html=True)
-    
-    # Tasks section
-    st.markdown('<div class="subsection-header">1- المهام</div>', unsafe_allow_html=True)
+    # Section header and the tasks subsection header
+    st.markdown(ACTUAL_DESCRIPTION_HEADERS_HTML, unsafe_allow_html=True)
     
     # Leadership tasks
     st.markdown("**المهام القيادية/الإشرافية:**")
-    for i, task in enumerate(st.session_state.form_data['leadership_tasks']):
-        with st.container():
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.session_state.form_data['leadership_tasks'][i] = st.text_input(
-                    "المهمة",
-                    value=task,
-                    key=f"leadership_task_{i}"
-                )
-            with col2:
-                if st.button("حذف", key=f"remove_leadership_task_{i}", type="secondary"):
-                    st.session_state.form_data['leadership_tasks'].pop(i)
-                    st.rerun()
-                    break
-    
-    if st.button("+ إضافة مهمة قيادية", key="add_leadership_task", type="primary"):
-        st.session_state.form_data['leadership_tasks'].append('')
-        st.rerun()
+    render_tasks_editor('leadership_tasks')
     
     st.markdown("---")
     
     # Specialized tasks
     st.markdown("**المهام التخصصية:**")
-    for i, task in enumerate(st.session_state.form_data['specialized_tasks']):
-        with st.container():
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.session_state.form_data['specialized_tasks'][i] = st.text_input(
-                    "المهمة",
-                    value=task,
-                    key=f"specialized_task_{i}"
-                )
-            with col2:
-                if st.button("حذف", key=f"remove_specialized_task_{i}", type="secondary"):
-                    st.session_state.form_data['specialized_tasks'].pop(i)
-                    st.rerun()
-                    break
-    
-    if st.button("+ إضافة مهمة تخصصية", key="add_specialized_task", type="primary"):
-        st.session_state.form_data['specialized_tasks'].append('')
-        st.rerun()
+    render_tasks_editor('specialized_tasks')
     
     st.markdown("---")
     
     # Other tasks
     st.markdown("**مهام أخرى إضافية:**")
-    for i, task in enumerate(st.session_state.form_data['other_tasks']):
-        with st.container():
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.session_state.form_data['other_tasks'][i] = st.text_input(
-                    "المهمة",
-                    value=task,
-                    key=f"other_task_{i}"
-                )
-            with col2:
-                if st.button("حذف", key=f"remove_other_task_{i}", type="secondary"):
-                    st.session_state.form_data['other_tasks'].pop(i)
-                    st.rerun()
-                    break
-    
-    if st.button("+ إضافة مهمة أخرى", key="add_other_task", type="primary"):
-        st.session_state.form_data['other_tasks'].append('')
-        st.rerun()
+    render_tasks_editor('other_tasks')
+
+# Shown under grids held in an st.form: their edits only reach form_data
+# (and so the report and validation) once the form is submitted
+FORM_PENDING_NOTE = "💡 لن تُضاف التعديلات في هذا الجدول إلى التقرير إلا بعد الضغط على \"{}\""
 
+@st.fragment
 def render_competencies_tables():
     """Render the competencies tables section"""
     st.markdown('<div class="subsection-header">2- الجدارات السلوكية والفنية</div>', unsafe_allow_html=True)
     
-    # Behavioral competencies table
-    st.markdown("**الجدارات السلوكية:**")
-    for i, comp in enumerate(st.session_state.form_data['behavioral_table']):
-        with st.container():
-            col1, col2, col3, col4 = st.columns([1, 3, 2, 1])
-            with col1:
-                comp['number'] = i + 1
-                st.text_input(
-                    "الرقم",
-                    value=comp['number'],
-                    key=f"behavioral_table_number_{i}",
-                    disabled=True
-                )
-            with col2:
-                comp['name'] = st.text_input(
-                    "الجدارة",
-                    value=comp['name'],
-                    key=f"behavioral_table_name_{i}"
-                )
-            with col3:
-                comp['level'] = st.text_input(
-                    "مستوى الإتقان",
-                    value=comp['level'],
-                    key=f"behavioral_table_level_{i}"
-                )
-            with col4:
-                if st.button("حذف", key=f"remove_behavioral_table_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['behavioral_table'], i)
-                    break
-    
-    if st.button("+ إضافة صف سلوكي", key="add_behavioral_table", type="primary"):
-        new_number = len(st.session_state.form_data['behavioral_table']) + 1
-        add_row(st.session_state.form_data['behavioral_table'], {'number': new_number, 'name': '', 'level': ''})
-    
-    st.markdown("---")
-    
-    # Technical competencies table
-    st.markdown("**الجدارات الفنية:**")
-    for i, comp in enumerate(st.session_state.form_data['technical_table']):
-        with st.container():
-            col1, col2, col3, col4 = st.columns([1, 3, 2, 1])
-            with col1:
-                comp['number'] = i + 1
-                st.text_input(
-                    "الرقم",
-                    value=comp['number'],
-                    key=f"technical_table_number_{i}",
-                    disabled=True
-                )
-            with col2:
-                comp['name'] = st.text_input(
-                    "الجدارة",
-                    value=comp['name'],
-                    key=f"technical_table_name_{i}"
-                )
-            with col3:
-                comp['level'] = st.text_input(
-                    "مستوى الإتقان",
-                    value=comp['level'],
-                    key=f"technical_table_level_{i}"
-                )
-            with col4:
-                if st.button("حذف", key=f"remove_technical_table_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['technical_table'], i)
-                    break
-    
-    if st.button("+ إضافة صف فني", key="add_technical_table", type="primary"):
-        new_number = len(st.session_state.form_data['technical_table']) + 1
-        add_row(st.session_state.form_data['technical_table'], {'number': new_number, 'name': '', 'level': ''})
+    # Edits to both tables are applied together when the form is submitted
+    with st.form("competencies_tables_form", clear_on_submit=False):
+        # Behavioral competencies table
+        st.markdown("**الجدارات السلوكية:**")
+        render_rows_editor('behavioral_table', COMPETENCY_COLUMNS, numbered=True)
+        
+        st.markdown("---")
+        
+        # Technical competencies table
+        st.markdown("**الجدارات الفنية:**")
+        render_rows_editor('technical_table', COMPETENCY_COLUMNS, numbered=True)
+        
+        st.info(FORM_PENDING_NOTE.format("تحديث الجدارات"))
+        st.form_submit_button("تحديث الجدارات")
 
+@st.fragment
 def render_kpis():
     """Render the KPIs section"""
     st.markdown('<div class="subsection-header">3- إدارة الأداء المهني</div>', unsafe_allow_html=True)
     
-    for i, kpi in enumerate(st.session_state.form_data['kpis']):
-        with st.container():
-            col1, col2, col3, col4 = st.columns([1, 3, 3, 1])
-            with col1:
-                kpi['number'] = i + 1
-                st.text_input(
-                    "الرقم",
-                    value=kpi['number'],
-                    key=f"kpi_number_{i}",
-                    disabled=True
-                )
-            with col2:
-                kpi['metric'] = st.text_input(
-                    "مؤشرات الأداء الرئيسية",
-                    value=kpi['metric'],
-                    key=f"kpi_metric_{i}"
-                )
-            with col3:
-                kpi['measure'] = st.text_input(
-                    "طريقة القياس",
-                    value=kpi['measure'],
-                    key=f"kpi_measure_{i}"
-                )
-            with col4:
-                if st.button("حذف", key=f"remove_kpi_{i}", type="secondary"):
-                    remove_row(st.session_state.form_data['kpis'], i)
-                    break
-    
-    if st.button("+ إضافة مؤشر أداء", key="add_kpi", type="primary"):
-        new_number = len(st.session_state.form_data['kpis']) + 1
-        add_row(st.session_state.form_data['kpis'], {'number': new_number, 'metric': '', 'measure': ''})
+    with st.form("kpis_form", clear_on_submit=False):
+        render_rows_editor('kpis', KPI_COLUMNS, numbered=True)
+        st.info(FORM_PENDING_NOTE.format("تحديث المؤشرات"))
+        st.form_submit_button("تحديث المؤشرات")
 
-def validate_form() -> tuple[bool, List[str]]:
-    """Validate the form and return validation status and errors"""
+# Validation messages for a communication row missing its purpose
+INTERNAL_COMM_ERROR = "جهة التواصل الداخلية {}: يجب تحديد الغرض من التواصل"
+EXTERNAL_COMM_ERROR = "جهة التواصل الخارجية {}: يجب تحديد الغرض من التواصل"
+
+def missing_purpose(entity: str, purpose: str) -> bool:
+    """Return True if a communication names an entity but gives no purpose"""
+    return bool(entity.strip()) and not purpose.strip()
+
+def collect_errors(form_data: Dict[str, Any]) -> List[str]:
+    """Return the error messages for every problem in the form data"""
+    ref_data = form_data['ref_data']
     errors = []
     
     # Required fields validation
-    if not st.session_state.form_data['ref_data']['job'].strip():
+    if not ref_data['job'].strip():
         errors.append("حقل 'المهنة' مطلوب")
     
-    if not st.session_state.form_data['ref_data']['work_location'].strip():
+    if not ref_data['work_location'].strip():
         errors.append("حقل 'موقع العمل' مطلوب")
     
     # Communication validation
-    for i, comm in enumerate(st.session_state.form_data['internal_communications']):
-        if comm['entity'].strip() and not comm['purpose'].strip():
-            errors.append(f"جهة التواصل الداخلية {i+1}: يجب تحديد الغرض من التواصل")
+    for i, comm in enumerate(form_data['internal_communications']):
+        if missing_purpose(comm['entity'], comm['purpose']):
+            errors.append(INTERNAL_COMM_ERROR.format(i + 1))
     
-    for i, comm in enumerate(st.session_state.form_data['external_communications']):
-        if comm['entity'].strip() and not comm['purpose'].strip():
-            errors.append(f"جهة التواصل الخارجية {i+1}: يجب تحديد الغرض من التواصل")
+    for i, comm in enumerate(form_data['external_communications']):
+        if missing_purpose(comm['entity'], comm['purpose']):
+            errors.append(EXTERNAL_COMM_ERROR.format(i + 1))
     
-    return len(errors) == 0, errors
+    return errors
 
-def generate_json_output() -> str:
-    """Generate the final JSON output matching the schema"""
+def validate_form() -> tuple[bool, List[str]]:
+    """Validate the form and return validation status and errors"""
+    # A few strip() calls over short lists; cheaper to run than to cache
+    errors = collect_errors(st.session_state.form_data)
+    return not errors, errors
+
+# Projects a competency table row down to the fields exported to JSON
+name_and_level = itemgetter('name', 'level')
+
+def freeze(value):
+    """Return a hashable snapshot of nested form data, for use as a cache key"""
+    if isinstance(value, dict):
+        return tuple((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_json_output(frozen_form, _form_data) -> str:
+    """Serialize form data to the output schema.
+    
+    Cached on frozen_form, the freeze() snapshot of _form_data; the
+    underscore keeps Streamlit from hashing the dict itself.
+    """
+    form_data = _form_data
+    ref_data = form_data['ref_data']
     output = {
-        "ref": {
-            "main_group": st.session_state.form_data['ref_data']['main_group'],
-            "main_group_code": st.session_state.form_data['ref_data']['main_group_code'],
-            "sub_group": st.session_state.form_data['ref_data']['sub_group'],
-            "sub_group_code": st.session_state.form_data['ref_data']['sub_group_code'],
-            "secondary_group": st.session_state.form_data['ref_data']['secondary_group'],
-            "secondary_group_code": st.session_state.form_data['ref_data']['secondary_group_code'],
-            "unit_group": st.session_state.form_data['ref_data']['unit_group'],
-            "unit_group_code": st.session_state.form_data['ref_data']['unit_group_code'],
-            "job": st.session_state.form_data['ref_data']['job'],
-            "job_code": st.session_state.form_data['ref_data']['job_code'],
-            "work_location": st.session_state.form_data['ref_data']['work_location'],
-            "grade": st.session_state.form_data['ref_data']['grade']
-        },
-        "summary": st.session_state.form_data['summary'],
+        "ref": {key: ref_data[key] for key in REF_KEYS},
+        "summary": form_data['summary'],
         "comm": {
-            "internal": st.session_state.form_data['internal_communications'],
-            "external": st.session_state.form_data['external_communications']
+            "internal": form_data['internal_communications'],
+            "external": form_data['external_communications']
         },
-        "levels": st.session_state.form_data['job_levels'],
+        "levels": form_data['job_levels'],
         "comp": {
-            "behavioral": st.session_state.form_data['behavioral_competencies'],
-            "core": st.session_state.form_data['core_competencies'],
-            "lead": st.session_state.form_data['leadership_competencies'],
-            "tech": st.session_state.form_data['technical_competencies']
+            "behavioral": form_data['behavioral_competencies'],
+            "core": form_data['core_competencies'],
+            "lead": form_data['leadership_competencies'],
+            "tech": form_data['technical_competencies']
         },
         "tasks": {
-            "lead": st.session_state.form_data['leadership_tasks'],
-            "spec": st.session_state.form_data['specialized_tasks'],
-            "other": st.session_state.form_data['other_tasks']
+            "lead": form_data['leadership_tasks'],
+            "spec": form_data['specialized_tasks'],
+            "other": form_data['other_tasks']
         },
-        "beh": [{"name": comp['name'], "level": comp['level']} for comp in st.session_state.form_data['behavioral_table']],
-        "tech": [{"name": comp['name'], "level": comp['level']} for comp in st.session_state.form_data['technical_table']],
-        "kpis": st.session_state.form_data['kpis']
+        "beh": [{"name": name, "level": level} for name, level in map(name_and_level, form_data['behavioral_table'])],
+        "tech": [{"name": name, "level": level} for name, level in map(name_and_level, form_data['technical_table'])],
+        "kpis": [
+            {'number': number, **{k: v for k, v in kpi.items() if k != 'number'}}
+            for number, kpi in enumerate(form_data['kpis'], 1)
+        ]
     }
     
+    if orjson is not None:
+        return orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
     return json.dumps(output, ensure_ascii=False, indent=2)
 
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=16)
+def build_docx(frozen_form, ai_analysis, _form_data):
+    """Generate the DOCX report, cached on the freeze() snapshot of _form_data"""
+    return generate_docx_report(_form_data, ai_analysis)
+
+def generate_json_output() -> str:
+    """Generate the final JSON output matching the schema"""
+    form_data = st.session_state.form_data
+    return build_json_output(freeze(form_data), form_data)
+
+# Report contents listed after a DOCX is generated, as (label, predicate)
+PREVIEW_SPECS = (
+    ("• البيانات المرجعية للمهنة", lambda fd: bool(fd.get('ref_data', {}).get('job'))),
+    ("• ملخص الوظيفة", lambda fd: bool(fd.get('summary'))),
+    ("• قنوات التواصل", lambda fd: any(
+        has_communication(row)
+        for key in ('internal_communications', 'external_communications') for row in fd.get(key, ()))),
+    ("• الكفاءات المطلوبة", lambda fd: any(
+        has_competency(row) for key in COMPETENCY_KEYS for row in fd.get(key, ()))),
+    ("• المهام والمسؤوليات", lambda fd: any(task for key in TASK_KEYS for task in fd.get(key, ()))),
+    ("• مؤشرات الأداء", lambda fd: any(has_kpi(row) for row in fd.get('kpis', ()))),
+)
+
 def main():
     """Main application function"""
     # Initialize session state
@@ -1780,77 +1391,53 @@ def main():
                 # Get AI analysis from session state if available
                 ai_analysis = st.session_state.get('last_ai_analysis', None)
                 
-                # Generate DOCX
-                docx_content = generate_docx_report(st.session_state.form_data, ai_analysis)
+                # Generate DOCX (cached, so repeated clicks on unchanged data are free)
+                form_data = st.session_state.form_data
+                try:
+                    docx_content = build_docx(freeze(form_data), ai_analysis, form_data)
+                except Exception as e:
+                    st.error(f"خطأ في إنشاء التقرير DOCX: {str(e)}")
+                    docx_content = None
                 
                 if docx_content:
                     # Create filename with timestamp
-                    from datetime import datetime
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    timestamp = datetime.now().strftime(TIMESTAMP_FMT)
                     filename = f"بطاقة_الوصف_المهني_{timestamp}.docx"
-                    
-                    # Download button
-                    st.download_button(
-                        label="تحميل التقرير DOCX",
-                        data=docx_content,
-                        file_name=filename,
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        use_container_width=True
-                    )
-                    st.success(f"تم إنشاء التقرير DOCX بنجاح! يمكنك تحميله الآن.")
-                    
-                    # Show DOCX preview info
-                    st.info("التقرير يتضمن:")
-                    preview_items = []
-                    if st.session_state.form_data.get('ref_data', {}).get('job'):
-                        preview_items.append("• البيانات المرجعية للمهنة")
-                    if st.session_state.form_data.get('summary'):
-                        preview_items.append("• ملخص الوظيفة")
-                    if any(st.session_state.form_data.get('internal_communications', [])):
-                        preview_items.append("• قنوات التواصل")
-                    if any(st.session_state.form_data.get('behavioral_competencies', [])):
-                        preview_items.append("• الكفاءات المطلوبة")
-                    if any(st.session_state.form_data.get('leadership_tasks', [])):
-                        preview_items.append("• المهام والمسؤوليات")
-                    if any(st.session_state.form_data.get('kpis', [])):
-                        preview_items.append("• مؤشرات الأداء")
-                    
-                    for item in preview_items:
-                        st.write(item)
-                    
+                    preview_items = tuple(label for label, is_filled in PREVIEW_SPECS if is_filled(form_data))
+                    st.session_state.last_docx = (filename, docx_content, preview_items)
                 else:
+                    st.session_state.pop('last_docx', None)
                     st.error("فشل في إنشاء التقرير DOCX")
         else:
-            st.error("يوجد أخطاء في البيانات:")
-            for error in errors:
-                st.error(f"• {error}")
+            st.session_state.pop('last_docx', None)
+            st.error("يوجد أخطاء في البيانات:\n\n" + "\n\n".join(f"• {error}" for error in errors))
+    
+    # The last generated report stays downloadable across reruns until the
+    # form is regenerated or reset
+    if 'last_docx' in st.session_state:
+        filename, docx_content, preview_items = st.session_state.last_docx
+        
+        # Download button
+        st.download_button(
+            label="تحميل التقرير DOCX",
+            data=docx_content,
+            file_name=filename,
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            use_container_width=True
+        )
+        st.success(f"تم إنشاء التقرير DOCX بنجاح! يمكنك تحميله الآن.")
+        
+        # Show DOCX preview info
+        st.info("التقرير يتضمن:")
+        st.markdown("  \n".join(preview_items))
     
     # Additional options in columns
     col1, col2, col3 = st.columns(3)
     
     with col1:
         if st.button("إعادة تعيين", key="reset_form", type="secondary", use_container_width=True):
-            st.session_state.form_data = {
-                'ref_data': {
-                    'main_group': '', 'main_group_code': '', 'sub_group': '', 'sub_group_code': '',
-                    'secondary_group': '', 'secondary_group_code': '', 'unit_group': '', 'unit_group_code': '',
-                    'job': '', 'job_code': '', 'work_location': '', 'grade': ''
-                },
-                'summary': '',
-                'internal_communications': [{'entity': '', 'purpose': ''}],
-                'external_communications': [{'entity': '', 'purpose': ''}],
-                'job_levels': [{'level': '', 'code': '', 'role': '', 'progression': ''}],
-                'behavioral_competencies': [{'name': '', 'level': ''}],
-                'core_competencies': [{'name': '', 'level': ''}],
-                'leadership_competencies': [{'name': '', 'level': ''}],
-                'technical_competencies': [{'name': '', 'level': ''}],
-                'leadership_tasks': [''],
-                'specialized_tasks': [''],
-                'other_tasks': [''],
-                'behavioral_table': [{'number': 1, 'name': '', 'level': ''}],
-                'technical_table': [{'number': 1, 'name': '', 'level': ''}],
-                'kpis': [{'number': 1, 'metric': '', 'measure': ''}]
-            }
+            st.session_state.form_data = copy.deepcopy(EMPTY_FORM)
+            st.session_state.pop('last_docx', None)
             st.rerun()
     
     with col2:
@@ -1860,9 +1447,7 @@ def main():
                 st.success("تم التحقق من صحة البيانات بنجاح!")
                 st.info("يمكنك الآن إنشاء تقرير DOCX")
             else:
-                st.error("يوجد أخطاء في البيانات:")
-                for error in errors:
-                    st.error(f"• {error}")
+                st.error("يوجد أخطاء في البيانات:\n\n" + "\n\n".join(f"• {error}" for error in errors))
     
     with col3:
         st.info("استخدم زر 'إنشاء تقرير DOCX احترافي' أعلاه لإنشاء التقرير")
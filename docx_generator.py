@@ -8,6 +8,18 @@ from docx.oxml.table import CT_Tbl
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tc
 
+# Style id of "Table Grid" in python-docx's default template
+GRID_STYLE_ID = 'TableGrid'
+
+def use_grid_style(table):
+    """Apply the Table Grid style to a table by its style id.
+    
+    Assigning table.style by name makes python-docx scan every style in the
+    document to rule out the default table style, on every table; the id is
+    fixed, so write it directly.
+    """
+    table._tbl.tblStyle_val = GRID_STYLE_ID
+
 def set_cell_shading(cell, hex_color):
     """Apply table cell background color using OXML"""
     tc = cell._tc
@@ -36,11 +48,20 @@ def set_cell_borders(cell, color="000000", size=6):
     
     tcPr.append(tcBorders)
 
+def table_cells(table):
+    """Return a table's cells as a list of rows.
+    
+    table.cell() and column.cells rebuild the cell list of the whole table on
+    every call; reading each row's cells once keeps filling a table linear.
+    """
+    return [row.cells for row in table.rows]
+
 def set_col_widths(table, widths_in_cm):
     """Set exact column widths in centimeters"""
-    for i, width in enumerate(widths_in_cm):
-        for cell in table.columns[i].cells:
-            cell.width = Cm(width)
+    widths = [Cm(width) for width in widths_in_cm]
+    for row_cells in table_cells(table):
+        for cell, width in zip(row_cells, widths):
+            cell.width = width
 
 def arabic(p):
     """Force paragraph RTL + right alignment for Arabic text"""
@@ -67,10 +88,27 @@ def merge_vertically(table, col_idx, row_start, row_end):
             vMerge.set(qn('w:val'), 'continue')
             tcPr.append(vMerge)
 
+# Style id of "Heading 1" in python-docx's default template
+HEADING_1_STYLE_ID = 'Heading1'
+
+def create_title(doc, text):
+    """Add a centered, bold 20pt level-1 heading.
+    
+    Equivalent to doc.add_heading(text, level=1), but sets the style by id
+    rather than name, which spares python-docx a scan of every style.
+    """
+    title = doc.add_paragraph(text)
+    title._p.style = HEADING_1_STYLE_ID
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in title.runs:
+        run.font.size = Cm(0.71)  # 20pt
+        run.font.bold = True
+    return title
+
 def create_header_band(doc, text):
     """Create a header band table with the specified text"""
     table = doc.add_table(rows=1, cols=1)
-    table.style = 'Table Grid'
+    use_grid_style(table)
     cell = table.cell(0, 0)
     
     # Set cell properties
@@ -112,11 +150,7 @@ def generate_docx_report(form_data):
     
     # Section A: نموذج بطاقة الوصف المهني
     # Top title - centered, bold 20pt
-    title = doc.add_heading("أ- نموذج بطاقة الوصف المهني", level=1)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for run in title.runs:
-        run.font.size = Cm(0.71)  # 20pt
-        run.font.bold = True
+    create_title(doc, "أ- نموذج بطاقة الوصف المهني")
     
     doc.add_paragraph()  # Spacing
     
@@ -126,10 +160,11 @@ def generate_docx_report(form_data):
     
     # Create the reference data table
     ref_table = doc.add_table(rows=7, cols=3)
-    ref_table.style = 'Table Grid'
+    use_grid_style(ref_table)
     
     # Set column widths
     set_col_widths(ref_table, [6.0, 5.0, 6.0])
+    ref_cells = table_cells(ref_table)
     
     # Set right column labels (main labels)
     right_labels = [
@@ -153,36 +188,29 @@ def generate_docx_report(form_data):
         ""   # blank
     ]
     
-    # Fill the table
+    # Fill the table; values follow the order of right_labels
     ref_data = form_data.get('ref_data', {})
+    ref_values = [ref_data.get(key, '') for key in
+                  ('main_group', 'sub_group', 'secondary_group', 'unit_group', 'job', 'work_location', 'grade')]
     for i in range(7):
         # Left column - values
-        left_cell = ref_table.cell(i, 0)
+        left_cell = ref_cells[i][0]
         set_cell_borders(left_cell)
         p = left_cell.paragraphs[0]
         arabic(p)
         
-        # Get value from ref_data
-        value = ""
-        if i == 0: value = ref_data.get('main_group', '')
-        elif i == 1: value = ref_data.get('sub_group', '')
-        elif i == 2: value = ref_data.get('secondary_group', '')
-        elif i == 3: value = ref_data.get('unit_group', '')
-        elif i == 4: value = ref_data.get('job', '')
-        elif i == 5: value = ref_data.get('work_location', '')
-        elif i == 6: value = ref_data.get('grade', '')
-        
+        value = ref_values[i]
         p.text = value.strip() if value else ""
         
         # Middle column - code labels
-        middle_cell = ref_table.cell(i, 1)
+        middle_cell = ref_cells[i][1]
         set_cell_borders(middle_cell)
         p = middle_cell.paragraphs[0]
         arabic(p)
         p.text = middle_labels[i]
         
         # Right column - main labels
-        right_cell = ref_table.cell(i, 2)
+        right_cell = ref_cells[i][2]
         set_cell_borders(right_cell)
         p = right_cell.paragraphs[0]
         arabic(p)
@@ -196,7 +224,7 @@ def generate_docx_report(form_data):
     
     # Summary table with fixed height
     summary_table = doc.add_table(rows=1, cols=1)
-    summary_table.style = 'Table Grid'
+    use_grid_style(summary_table)
     cell = summary_table.cell(0, 0)
     set_cell_borders(cell)
     
@@ -226,8 +254,9 @@ def generate_docx_report(form_data):
     
     # Communication table - single table with proper RTL column order
     comm_table = doc.add_table(rows=2, cols=3)
-    comm_table.style = 'Table Grid'
+    use_grid_style(comm_table)
     set_col_widths(comm_table, [6.5, 6.5, 4.0])
+    comm_cells = table_cells(comm_table)
     
     # Row 1: Internal communications
     internal_comms = form_data.get('internal_communications', [])
@@ -239,19 +268,19 @@ def generate_docx_report(form_data):
         purpose = ""
     
     # Row 1 - RTL column order: جهات التواصل الداخلية | الغرض من التواصل | (blank/value)
-    cell1 = comm_table.cell(0, 2)  # Rightmost: جهات التواصل الداخلية (header)
+    cell1 = comm_cells[0][2]  # Rightmost: جهات التواصل الداخلية (header)
     set_cell_borders(cell1)
     p = cell1.paragraphs[0]
     arabic(p)
     p.text = "جهات التواصل الداخلية"
     
-    cell2 = comm_table.cell(0, 1)  # Middle: الغرض من التواصل
+    cell2 = comm_cells[0][1]  # Middle: الغرض من التواصل
     set_cell_borders(cell2)
     p = cell2.paragraphs[0]
     arabic(p)
     p.text = purpose
     
-    cell3 = comm_table.cell(0, 0)  # Leftmost: (blank/value)
+    cell3 = comm_cells[0][0]  # Leftmost: (blank/value)
     set_cell_borders(cell3)
     p = cell3.paragraphs[0]
     arabic(p)
@@ -267,19 +296,19 @@ def generate_docx_report(form_data):
         purpose = ""
     
     # Row 2 - RTL column order: جهات التواصل الخارجية | الغرض من التواصل | (blank/value)
-    cell1 = comm_table.cell(1, 2)  # Rightmost: جهات التواصل الخارجية (header)
+    cell1 = comm_cells[1][2]  # Rightmost: جهات التواصل الخارجية (header)
     set_cell_borders(cell1)
     p = cell1.paragraphs[0]
     arabic(p)
     p.text = "جهات التواصل الخارجية"
     
-    cell2 = comm_table.cell(1, 1)  # Middle: الغرض من التواصل
+    cell2 = comm_cells[1][1]  # Middle: الغرض من التواصل
     set_cell_borders(cell2)
     p = cell2.paragraphs[0]
     arabic(p)
     p.text = purpose
     
-    cell3 = comm_table.cell(1, 0)  # Leftmost: (blank/value)
+    cell3 = comm_cells[1][0]  # Leftmost: (blank/value)
     set_cell_borders(cell3)
     p = cell3.paragraphs[0]
     arabic(p)
@@ -293,8 +322,9 @@ def generate_docx_report(form_data):
     
     # Job levels table - two columns, label on right, value on left
     level_table = doc.add_table(rows=4, cols=2)
-    level_table.style = 'Table Grid'
+    use_grid_style(level_table)
     set_col_widths(level_table, [8.5, 8.5])
+    level_cells = table_cells(level_table)
     
     # Right column labels
     right_labels = [
@@ -304,28 +334,22 @@ def generate_docx_report(form_data):
         "التدرج المهني (المرتبة)"
     ]
     
-    # Fill the table
+    # Fill the table from the first job level, in the order of right_labels
     job_levels = form_data.get('job_levels', [])
+    level = job_levels[0] if job_levels else {}
+    level_values = [level.get(key, '') for key in ('level', 'code', 'role', 'progression')]
     for i in range(4):
         # Left column - values
-        left_cell = level_table.cell(i, 0)
+        left_cell = level_cells[i][0]
         set_cell_borders(left_cell)
         p = left_cell.paragraphs[0]
         arabic(p)
         
-        # Get value from job_levels
-        value = ""
-        if job_levels and len(job_levels) > 0:
-            level = job_levels[0]
-            if i == 0: value = level.get('level', '')
-            elif i == 1: value = level.get('code', '')
-            elif i == 2: value = level.get('role', '')
-            elif i == 3: value = level.get('progression', '')
-        
+        value = level_values[i]
         p.text = value.strip() if value else ""
         
         # Right column - labels
-        right_cell = level_table.cell(i, 1)
+        right_cell = level_cells[i][1]
         set_cell_borders(right_cell)
         p = right_cell.paragraphs[0]
         arabic(p)
@@ -339,7 +363,7 @@ def generate_docx_report(form_data):
     
     # Competencies table - 3-column matrix layout as per template
     comp_table = doc.add_table(rows=4, cols=3)
-    comp_table.style = 'Table Grid'
+    use_grid_style(comp_table)
     set_col_widths(comp_table, [9.0, 5.0, 3.0])
     
     # Get competencies data
@@ -418,11 +442,7 @@ def generate_docx_report(form_data):
     
     # Section B: نموذج الوصف الفعلي
     # Top title - centered, bold 20pt
-    title = doc.add_heading("ب- نموذج الوصف الفعلي", level=1)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for run in title.runs:
-        run.font.size = Cm(0.71)  # 20pt
-        run.font.bold = True
+    create_title(doc, "ب- نموذج الوصف الفعلي")
     
     doc.add_paragraph()  # Spacing
     
@@ -432,11 +452,12 @@ def generate_docx_report(form_data):
     
     # Tasks table
     tasks_table = doc.add_table(rows=4, cols=1)
-    tasks_table.style = 'Table Grid'
+    use_grid_style(tasks_table)
     set_col_widths(tasks_table, [18.0])
+    tasks_cells = table_cells(tasks_table)
     
     # Row 1: Leadership tasks
-    cell = tasks_table.cell(0, 0)
+    cell = tasks_cells[0][0]
     set_cell_borders(cell)
     p = cell.paragraphs[0]
     arabic(p)
@@ -452,7 +473,7 @@ def generate_docx_report(form_data):
                 p.text = f"• {task.strip()}"
     
     # Row 2: Specialized tasks
-    cell = tasks_table.cell(1, 0)
+    cell = tasks_cells[1][0]
     set_cell_borders(cell)
     p = cell.paragraphs[0]
     arabic(p)
@@ -468,7 +489,7 @@ def generate_docx_report(form_data):
                 p.text = f"• {task.strip()}"
     
     # Row 3: Other tasks
-    cell = tasks_table.cell(2, 0)
+    cell = tasks_cells[2][0]
     set_cell_borders(cell)
     p = cell.paragraphs[0]
     arabic(p)
@@ -484,7 +505,7 @@ def generate_docx_report(form_data):
                 p.text = f"• {task.strip()}"
     
     # Row 4: Blank spacer
-    cell = tasks_table.cell(3, 0)
+    cell = tasks_cells[3][0]
     set_cell_borders(cell)
     
     # Set row heights
@@ -505,13 +526,14 @@ def generate_docx_report(form_data):
     
     # (a) Behavioral competencies table
     behavioral_table = doc.add_table(rows=6, cols=3)  # 1 header + 5 body rows
-    behavioral_table.style = 'Table Grid'
+    use_grid_style(behavioral_table)
     set_col_widths(behavioral_table, [2.0, 10.0, 5.0])
+    behavioral_cells = table_cells(behavioral_table)
     
     # Header row - RTL column order: الرقم | الجدارات السلوكية | مستوى الإتقان
     headers = ["الرقم", "الجدارات السلوكية", "مستوى الإتقان"]
     for i, header in enumerate(headers):
-        cell = behavioral_table.cell(0, i)
+        cell = behavioral_cells[0][i]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
@@ -523,41 +545,44 @@ def generate_docx_report(form_data):
     behavioral_data = form_data.get('behavioral_table', [])
     for i in range(5):
         row_idx = i + 1
+        row = behavioral_data[i] if i < len(behavioral_data) else {}
+        name, level = row.get('name'), row.get('level')
         
         # Number - center aligned in rightmost column
-        cell = behavioral_table.cell(row_idx, 0)
+        cell = behavioral_cells[row_idx][0]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
         p.text = str(i + 1)
         
         # Competency name - right aligned
-        cell = behavioral_table.cell(row_idx, 1)
+        cell = behavioral_cells[row_idx][1]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
-        if i < len(behavioral_data) and behavioral_data[i].get('name'):
-            p.text = behavioral_data[i]['name'].strip()
+        if name:
+            p.text = name.strip()
         
         # Level - right aligned
-        cell = behavioral_table.cell(row_idx, 2)
+        cell = behavioral_cells[row_idx][2]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
-        if i < len(behavioral_data) and behavioral_data[i].get('level'):
-            p.text = behavioral_data[i]['level'].strip()
+        if level:
+            p.text = level.strip()
     
     doc.add_paragraph()  # Spacing
     
     # (b) Technical competencies table
     technical_table = doc.add_table(rows=6, cols=3)  # 1 header + 5 body rows
-    technical_table.style = 'Table Grid'
+    use_grid_style(technical_table)
     set_col_widths(technical_table, [2.0, 10.0, 5.0])
+    technical_cells = table_cells(technical_table)
     
     # Header row - RTL column order: الرقم | الجدارات الفنية | مستوى الإتقان
     headers = ["الرقم", "الجدارات الفنية", "مستوى الإتقان"]
     for i, header in enumerate(headers):
-        cell = technical_table.cell(0, i)
+        cell = technical_cells[0][i]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
@@ -569,29 +594,31 @@ def generate_docx_report(form_data):
     technical_data = form_data.get('technical_table', [])
     for i in range(5):
         row_idx = i + 1
+        row = technical_data[i] if i < len(technical_data) else {}
+        name, level = row.get('name'), row.get('level')
         
         # Number - center aligned in rightmost column
-        cell = technical_table.cell(row_idx, 0)
+        cell = technical_cells[row_idx][0]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
         p.text = str(i + 1)
         
         # Competency name - right aligned
-        cell = technical_table.cell(row_idx, 1)
+        cell = technical_cells[row_idx][1]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
-        if i < len(technical_data) and technical_data[i].get('name'):
-            p.text = technical_data[i]['name'].strip()
+        if name:
+            p.text = name.strip()
         
         # Level - right aligned
-        cell = technical_table.cell(row_idx, 2)
+        cell = technical_cells[row_idx][2]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
-        if i < len(technical_data) and technical_data[i].get('level'):
-            p.text = technical_data[i]['level'].strip()
+        if level:
+            p.text = level.strip()
     
     doc.add_paragraph()  # Spacing
     
@@ -601,13 +628,14 @@ def generate_docx_report(form_data):
     
     # KPIs table - RTL column order: الرقم | مؤشرات الأداء الرئيسية | طريقة القياس
     kpi_table = doc.add_table(rows=5, cols=3)  # 1 header + 4 body rows
-    kpi_table.style = 'Table Grid'
+    use_grid_style(kpi_table)
     set_col_widths(kpi_table, [2.0, 9.0, 6.0])
+    kpi_cells = table_cells(kpi_table)
     
     # Header row - RTL column order: الرقم | مؤشرات الأداء الرئيسية | طريقة القياس
     headers = ["الرقم", "مؤشرات الأداء الرئيسية", "طريقة القياس"]
     for i, header in enumerate(headers):
-        cell = kpi_table.cell(0, i)
+        cell = kpi_cells[0][i]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
@@ -619,28 +647,30 @@ def generate_docx_report(form_data):
     kpis = form_data.get('kpis', [])
     for i in range(4):
         row_idx = i + 1
+        row = kpis[i] if i < len(kpis) else {}
+        metric, measure = row.get('metric'), row.get('measure')
         
         # Number - center aligned in rightmost column
-        cell = kpi_table.cell(row_idx, 0)
+        cell = kpi_cells[row_idx][0]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         p.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
         p.text = str(i + 1)
         
         # KPI metric - right aligned
-        cell = kpi_table.cell(row_idx, 1)
+        cell = kpi_cells[row_idx][1]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
-        if i < len(kpis) and kpis[i].get('metric'):
-            p.text = kpis[i]['metric'].strip()
+        if metric:
+            p.text = metric.strip()
         
         # Measurement method - right aligned
-        cell = kpi_table.cell(row_idx, 2)
+        cell = kpi_cells[row_idx][2]
         set_cell_borders(cell)
         p = cell.paragraphs[0]
         arabic(p)
-        if i < len(kpis) and kpis[i].get('measure'):
-            p.text = kpis[i]['measure'].strip()
+        if measure:
+            p.text = measure.strip()
     
     return doc
@@ -0,0 +1,35 @@
+# Row predicates for the repeatable form sections. Kept free of Streamlit and
+# ReportLab so the app can check and summarize form rows without loading the
+# PDF stack.
+from typing import Callable, Iterable, Optional
+
+
+def has_values(row: dict) -> bool:
+    """Return True if any field of a form row is filled in"""
+    return any(row.values())
+
+# Row predicates specialised per row shape: reading the known keys
+# directly is cheaper than building a dict_values view for every row
+def has_communication(row: dict) -> bool:
+    """Return True if a communication row has an entity or purpose"""
+    get = row.get
+    return bool(get('entity') or get('purpose'))
+
+def has_job_level(row: dict) -> bool:
+    """Return True if a job level row has any of its fields filled in"""
+    get = row.get
+    return bool(get('level') or get('code') or get('role') or get('progression'))
+
+def has_competency(row: dict) -> bool:
+    """Return True if a competency row has a name or level"""
+    get = row.get
+    return bool(get('name') or get('level'))
+
+def has_kpi(row: dict) -> bool:
+    """Return True if a KPI row has a metric or measure"""
+    get = row.get
+    return bool(get('metric') or get('measure'))
+
+def prune_rows(rows: Optional[Iterable[dict]], pred: Callable[[dict], bool] = has_values) -> list:
+    """Return the rows that pass pred, in a single pass over the list"""
+    return [row for row in rows or () if pred(row)]
@@ -0,0 +1,431 @@
+# Section builders for the PDF report, kept free of Streamlit.
+import re
+import sys
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from reportlab import rl_config
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle, ListFlowable, ListItem, Flowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+# Arabic text processing
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+from form_rows import has_communication, has_job_level, has_competency, has_kpi, prune_rows
+
+# Skip ReportLab's per-attribute validation of every flowable we build
+rl_config.shapeChecking = 0
+
+# Right-to-left scripts (Hebrew through Arabic Extended, and the Hebrew and
+# Arabic presentation forms) plus explicit bidi controls; text without any of
+# these comes out of reshaping and the bidi algorithm unchanged
+_RTL_RE = re.compile('[\u0590-\u08ff\ufb1d-\ufdff\ufe70-\ufeff\u200e\u200f\u202a-\u202e\u2066-\u2069]')
+
+def process_arabic_text(text: Any) -> Any:
+    """Process Arabic text for proper display in PDF"""
+    if not text or not isinstance(text, str):
+        return text
+    
+    # Latin text, numbers and codes need neither reshaping nor reordering
+    if _RTL_RE.search(text) is None:
+        return text
+    
+    # Reshape Arabic text, then apply the bidirectional algorithm for RTL text
+    return get_display(arabic_reshaper.reshape(text))
+
+@lru_cache(maxsize=4096)
+def _A_cached(text: str) -> str:
+    """Memoized process_arabic_text; shaping is pure, so repeated strings are free"""
+    return process_arabic_text(text)
+
+def A(text: Any) -> Any:
+    """Short alias for process_arabic_text to keep code tidy"""
+    if not isinstance(text, str):
+        return text
+    return _A_cached(text)
+
+# Static labels used by the PDF report, shaped once at import so the
+# first report generated also hits the cache
+PDF_STATIC_LABELS = (
+    "نظام بطاقة الوصف المهني",
+    "أ‌- البيانات المرجعية للمهنة",
+    "ب‌- ملخص الوظيفة",
+    "ج‌- قنوات التواصل",
+    "التواصل الداخلي:",
+    "لا توجد بيانات",
+    "التواصل الخارجي:",
+    "د‌- مستويات الوظيفة",
+    "هـ- الكفاءات المطلوبة",
+    "الكفاءات السلوكية:",
+    "الكفاءات الأساسية:",
+    "الكفاءات القيادية:",
+    "الكفاءات التقنية:",
+    "و‌- المهام",
+    "المهام القيادية:",
+    "المهام المتخصصة:",
+    "المهام الأخرى:",
+    "ز‌- مؤشرات الأداء الرئيسية",
+    "تحليل الذكاء الاصطناعي",
+    "ملخص التحليل:",
+    "تحليل نصي:",
+    "تم إنشاء هذا التقرير بواسطة نظام بطاقة الوصف المهني",
+)
+for _label in PDF_STATIC_LABELS:
+    A(_label)
+
+# Table header rows and reference field labels, shaped once at import
+_REF_TABLE_HEADER = (A("المجال"), A("القيمة"))
+_REF_FIELD_LABELS = tuple((key, A(label)) for key, label in (
+    ('main_group', "المجموعة الرئيسية"),
+    ('main_group_code', "رمز المجموعة الرئيسية"),
+    ('sub_group', "المجموعة الفرعية"),
+    ('sub_group_code', "رمز المجموعة الفرعية"),
+    ('secondary_group', "المجموعة الثانوية"),
+    ('secondary_group_code', "رمز المجموعة الثانوية"),
+    ('unit_group', "مجموعة الوحدات"),
+    ('unit_group_code', "رمز الوحدات"),
+    ('job', "المهنة"),
+    ('job_code', "رمز المهنة"),
+    ('work_location', "موقع العمل"),
+    ('grade', "المرتبة"),
+))
+_LEVEL_TABLE_HEADER = (A("المستوى"), A("الرمز"), A("الدور"), A("التقدم"))
+_KPI_TABLE_HEADER = (A("الرقم"), A("المؤشر"), A("القياس"))
+
+@lru_cache(maxsize=64)
+def _parsed_frags(shaped_text: str, style: ParagraphStyle) -> list:
+    """Parse a paragraph's markup once; Paragraph only reads its frags"""
+    return Paragraph(shaped_text, style).frags
+
+def label_paragraph(text: str, style: ParagraphStyle) -> Paragraph:
+    """Build a Paragraph for a static label, reusing its shaped text and parse.
+    
+    A new flowable is returned every time: ReportLab keeps layout state on
+    flowables (e.g. _postponed), so instances must not be shared.
+    """
+    shaped_text = A(text)
+    return Paragraph(shaped_text, style, frags=_parsed_frags(shaped_text, style))
+
+def rtl_list(items: List[ListItem], style: ParagraphStyle, bullet_type: str = 'bullet') -> ListFlowable:
+    """Wrap list items in a single right-to-left ListFlowable sharing one style"""
+    return ListFlowable(
+        items,
+        bulletType=bullet_type,
+        bulletFormat='%s.' if bullet_type == '1' else None,
+        bulletDir='rtl',
+        bulletFontName=style.fontName,
+        bulletFontSize=style.fontSize,
+        leftIndent=0,
+        rightIndent=18
+    )
+
+def format_entity_purpose(comm: dict) -> str:
+    """Format a communication row as 'entity - purpose'"""
+    get = comm.get
+    entity, purpose = get('entity', ''), get('purpose', '')
+    return f"{entity} - {purpose}"
+
+def format_name_level(comp: dict) -> str:
+    """Format a competency row as 'name - level'"""
+    get = comp.get
+    name, level = get('name', ''), get('level', '')
+    return f"{name} - المستوى: {level}"
+
+def kpi_row(number: int, kpi: dict) -> List[str]:
+    """Format a KPI as a table row; numbers repeat across reports, so intern them"""
+    get = kpi.get
+    return [sys.intern(str(number)), A(get('metric', '')), A(get('measure', ''))]
+
+# Leave sections with nothing filled in out of the PDF instead of printing
+# a "no data" placeholder under their heading
+OMIT_EMPTY_SECTIONS = True
+
+# PDF list sub-sections as (form key, subheading, row formatter, row
+# predicate); a formatter of None marks a numbered list of plain task strings
+PDF_COMMUNICATION_SECTIONS = (
+    ('internal_communications', "التواصل الداخلي:", format_entity_purpose, has_communication),
+    ('external_communications', "التواصل الخارجي:", format_entity_purpose, has_communication),
+)
+PDF_COMPETENCY_SECTIONS = (
+    ('behavioral_competencies', "الكفاءات السلوكية:", format_name_level, has_competency),
+    ('core_competencies', "الكفاءات الأساسية:", format_name_level, has_competency),
+    ('leadership_competencies', "الكفاءات القيادية:", format_name_level, has_competency),
+    ('technical_competencies', "الكفاءات التقنية:", format_name_level, has_competency),
+)
+PDF_TASK_SECTIONS = (
+    ('leadership_tasks', "المهام القيادية:", None, bool),
+    ('specialized_tasks', "المهام المتخصصة:", None, bool),
+    ('other_tasks', "المهام الأخرى:", None, bool),
+)
+
+def emit_list_section(form_data: dict, key: str, title: str, fmt: Optional[Callable[[dict], str]],
+                      pred: Callable[[Any], bool], styles: Dict[str, ParagraphStyle]) -> Iterator[Flowable]:
+    """Yield the flowables for one bulleted (or numbered) PDF sub-section"""
+    normal_style = styles['normal']
+    rows = form_data[key]
+    if fmt is None:
+        items = [ListItem(Paragraph(A(task), normal_style), value=i)
+                 for i, task in enumerate(rows, 1) if pred(task)]
+        bullet_type = '1'
+    else:
+        items = [ListItem(Paragraph(A(fmt(row)), normal_style))
+                 for row in prune_rows(rows, pred)]
+        bullet_type = 'bullet'
+    if not items and OMIT_EMPTY_SECTIONS:
+        return
+    yield label_paragraph(title, styles['subheading'])
+    if items:
+        yield rtl_list(items, normal_style, bullet_type=bullet_type)
+    else:
+        yield label_paragraph("لا توجد بيانات", normal_style)
+
+def emit_list_group(form_data: dict, sections: Tuple[tuple, ...], styles: Dict[str, ParagraphStyle]) -> Iterator[Flowable]:
+    """Yield a group of PDF list sub-sections separated by spacers"""
+    emitted = False
+    for key, title, fmt, pred in sections:
+        flowables = list(emit_list_section(form_data, key, title, fmt, pred, styles))
+        if not flowables:
+            continue
+        if emitted:
+            yield Spacer(1, 15)
+        yield from flowables
+        emitted = True
+    if emitted:
+        yield Spacer(1, 25)
+
+def build_list_group_section(heading: str, form_data: dict, sections: Tuple[tuple, ...],
+                             styles: Dict[str, ParagraphStyle]) -> List[Flowable]:
+    """Build a headed group of list sub-sections, or nothing if all were omitted"""
+    body = list(emit_list_group(form_data, sections, styles))
+    if not body:
+        return []
+    return [label_paragraph(heading, styles['heading']), Spacer(1, 10), *body]
+
+@lru_cache(maxsize=4)
+def build_pdf_styles(arabic_font: str, arabic_font_bold: str) -> Dict[str, ParagraphStyle]:
+    """Paragraph styles for the PDF report, built once per font pair.
+    
+    Reusing the same style objects across reports also lets label_paragraph
+    reuse its parsed fragments, which are cached per style.
+    """
+    styles = getSampleStyleSheet()
+    
+    # Create custom styles for Arabic text
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontName=arabic_font_bold,
+        fontSize=24,
+        alignment=TA_CENTER,
+        spaceAfter=30,
+        textColor=colors.darkblue
+    )
+    
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading2'],
+        fontName=arabic_font,
+        fontSize=14,
+        alignment=TA_CENTER,
+        spaceAfter=20,
+        textColor=colors.gray
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontName=arabic_font_bold,
+        fontSize=16,
+        alignment=TA_RIGHT,
+        spaceAfter=12,
+        textColor=colors.darkblue,
+        borderWidth=1,
+        borderColor=colors.darkblue,
+        borderPadding=5,
+        backColor=colors.lightblue
+    )
+    
+    subheading_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading3'],
+        fontName=arabic_font_bold,
+        fontSize=13,
+        alignment=TA_RIGHT,
+        spaceAfter=8,
+        textColor=colors.black
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontName=arabic_font,
+        fontSize=12,
+        alignment=TA_RIGHT,
+        spaceAfter=6
+    )
+    
+    highlight_style = ParagraphStyle(
+        'CustomHighlight',
+        parent=styles['Normal'],
+        fontName=arabic_font_bold,
+        fontSize=12,
+        alignment=TA_RIGHT,
+        textColor=colors.darkred,
+        spaceAfter=6
+    )
+    
+    return {
+        'title': title_style,
+        'subtitle': subtitle_style,
+        'heading': heading_style,
+        'subheading': subheading_style,
+        'normal': normal_style,
+        'highlight': highlight_style
+    }
+
+@lru_cache(maxsize=16)
+def _table_style(arabic_font: str, header_color: colors.Color, body_color: colors.Color,
+                 header_padding: int = 12, cell_padding: int = 8) -> TableStyle:
+    """Shared style for the report tables, built once per font and palette"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header_color),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), header_padding),
+        ('TOPPADDING', (0, 0), (-1, -1), cell_padding),
+        ('BACKGROUND', (0, 1), (-1, -1), body_color),
+        ('GRID', (0, 0), (-1, -1), 1, header_color),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [body_color, colors.white]),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, -1), arabic_font)
+    ])
+
+def build_pdf_reference_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the reference data heading and table"""
+    ref_data = form_data['ref_data']
+    ref_table_data: List[Any] = [_REF_TABLE_HEADER]
+    ref_table_data.extend([label, A(ref_data.get(key, ''))] for key, label in _REF_FIELD_LABELS)
+    
+    ref_table = Table(ref_table_data, colWidths=[2.5*inch, 3.5*inch])
+    ref_table.setStyle(_table_style(arabic_font, colors.darkblue, colors.lightblue, 15, 10))
+    return [
+        label_paragraph("أ‌- البيانات المرجعية للمهنة", styles['heading']),
+        Spacer(1, 10),
+        ref_table,
+        Spacer(1, 25)
+    ]
+
+def build_pdf_summary_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the highlighted job summary, if one was entered"""
+    summary_text = form_data['summary']
+    if not summary_text:
+        return []
+    return [
+        label_paragraph("ب‌- ملخص الوظيفة", styles['heading']),
+        Spacer(1, 10),
+        Paragraph(A(f"الملخص: {summary_text}"), styles['highlight']),
+        Spacer(1, 25)
+    ]
+
+def build_pdf_communications_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the internal and external communications lists"""
+    return build_list_group_section("ج‌- قنوات التواصل", form_data, PDF_COMMUNICATION_SECTIONS, styles)
+
+def build_pdf_job_levels_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the job levels table"""
+    job_levels = prune_rows(form_data['job_levels'], has_job_level)
+    if not job_levels and OMIT_EMPTY_SECTIONS:
+        return []
+    story = [label_paragraph("د‌- مستويات الوظيفة", styles['heading']), Spacer(1, 10)]
+    
+    if job_levels:
+        level_table_data: List[Any] = [_LEVEL_TABLE_HEADER]
+        for level in job_levels:
+            get = level.get
+            level_table_data.append([
+                A(get('level', '')),
+                A(get('code', '')),
+                A(get('role', '')),
+                A(get('progression', ''))
+            ])
+        
+        level_table = Table(level_table_data, colWidths=[1.5*inch, 1*inch, 2*inch, 1.5*inch])
+        level_table.setStyle(_table_style(arabic_font, colors.darkgreen, colors.lightgreen))
+        story.append(level_table)
+    else:
+        story.append(label_paragraph("لا توجد بيانات", styles['normal']))
+    
+    story.append(Spacer(1, 25))
+    return story
+
+def build_pdf_competencies_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the four competency lists"""
+    return build_list_group_section("هـ- الكفاءات المطلوبة", form_data, PDF_COMPETENCY_SECTIONS, styles)
+
+def build_pdf_tasks_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the three numbered task lists"""
+    return build_list_group_section("و‌- المهام", form_data, PDF_TASK_SECTIONS, styles)
+
+def build_pdf_kpis_section(form_data: dict, styles: Dict[str, ParagraphStyle], arabic_font: str) -> List[Flowable]:
+    """Build the KPIs table"""
+    # KPIs keep their position in the form as their number; rows are
+    # filtered and formatted in the same pass
+    kpi_rows = [kpi_row(number, kpi) for number, kpi in enumerate(form_data['kpis'], 1) if has_kpi(kpi)]
+    if not kpi_rows and OMIT_EMPTY_SECTIONS:
+        return []
+    story = [label_paragraph("ز‌- مؤشرات الأداء الرئيسية", styles['heading']), Spacer(1, 10)]
+    
+    if kpi_rows:
+        kpi_table_data: List[Any] = [_KPI_TABLE_HEADER]
+        kpi_table_data.extend(kpi_rows)
+        
+        kpi_table = Table(kpi_table_data, colWidths=[0.5*inch, 2.5*inch, 2*inch])
+        kpi_table.setStyle(_table_style(arabic_font, colors.darkred, colors.lightcoral))
+        story.append(kpi_table)
+    else:
+        story.append(label_paragraph("لا توجد بيانات", styles['normal']))
+    
+    return story
+
+# Form data keys read by the PDF section builders, with the value used when
+# a key is missing
+PDF_SECTION_DEFAULTS = {
+    'ref_data': {},
+    'summary': '',
+    'internal_communications': (),
+    'external_communications': (),
+    'job_levels': (),
+    'behavioral_competencies': (),
+    'core_competencies': (),
+    'leadership_competencies': (),
+    'technical_competencies': (),
+    'leadership_tasks': (),
+    'specialized_tasks': (),
+    'other_tasks': (),
+    'kpis': (),
+}
+PDF_SECTION_KEYS = tuple(PDF_SECTION_DEFAULTS)
+_get_sections = itemgetter(*PDF_SECTION_KEYS)
+
+def section_views(form_data: dict) -> Dict[str, Any]:
+    """Pull every key the section builders read out of form_data in one pass"""
+    return dict(zip(PDF_SECTION_KEYS, _get_sections({**PDF_SECTION_DEFAULTS, **form_data})))
+
+# Form sections of the PDF report, in document order. Each builder takes
+# the section_views() of the form, reads only its own keys and returns a
+# list of flowables.
+PDF_SECTION_BUILDERS = (
+    build_pdf_reference_section,
+    build_pdf_summary_section,
+    build_pdf_communications_section,
+    build_pdf_job_levels_section,
+    build_pdf_competencies_section,
+    build_pdf_tasks_section,
+    build_pdf_kpis_section,
+)